@@ -0,0 +1,244 @@
+# Approximate and heuristic FVS solvers, for graphs whose minimum FVS is far
+# too large for fvs_via_ic and fvs_via_mif. None of them prove anything about
+# the minimum: a `None` from fvs_via_approx only means no small enough FVS was
+# found. They all start from the reductions of fvs_disjoint with W empty
+# (vertices of degree <= 1 deleted, vertices with a self-loop taken, vertices
+# of degree 2 bypassed), which keep the minimum FVS size, and end with every
+# vertex of the FVS needed.
+#
+# * two_approx_fvs: the local ratio 2-approximation of Bafna, Berman and Fujito.
+# * degree_greedy_fvs: repeatedly take a vertex of maximum degree.
+# * local_search: improve an FVS by dropping a few nearby vertices and
+#   re-solving exactly what they covered.
+#
+# Each also serves as an upper bound for the exact solvers: they are warm
+# starts of iterative_compression under their names here.
+
+import heapq
+import random
+
+from fvs import *
+
+# Weights below this count as zero in two_approx_fvs.
+EPSILON = 1e-9
+
+# Apply the reductions with an empty W, mutating G. Returns the vertices taken.
+def reduce_graph(g: Graph, dirty=None) -> set:
+	(_, taken) = apply_reductions(g, DisjointSet(), 0, dirty)
+	return taken
+
+# Make an FVS of G minimal: put its vertices back into the forest G - S, lowest
+# degree first, whenever that closes no cycle. Takes O(m α(n)).
+def minimal_fvs(g: Graph, soln: set) -> set:
+	forest = induced_forest(g, g.vertices.difference(soln))
+	assert forest is not None, "Not an FVS"
+	soln = set(soln)
+	for v in sorted(soln, key=g.degree):
+		if add_to_forest(g, forest, v):
+			soln.discard(v)
+	return soln
+
+# The 2-approximation of Bafna, Berman and Fujito, with unit weights, after
+# the reductions. Local ratio steps lower the weights of the vertices left:
+# along a semidisjoint cycle (one whose vertices all have degree 2 but at most
+# one) by the smallest weight on it, and otherwise by γ(deg(v) - 1) for every
+# v, with γ as large as possible. A vertex whose weight reaches zero joins the
+# FVS and is deleted, together with the vertices left on no cycle. Finally the
+# vertices that are not needed are dropped in reverse order of joining.
+#
+# Weights are kept lazily, as the weight at the time a vertex's degree last
+# changed, so that a global step only costs a heap operation: it advances the
+# time t to the moment the first weight reaches zero. With the work of finding
+# semidisjoint cycles along chains of degree 2, this takes O(m log n) in
+# practice.
+def two_approx_fvs(g: Graph) -> set:
+	g = g.copy()
+	soln = reduce_graph(g)
+	h = g.copy()
+
+	t = 0.0
+	weight = dict.fromkeys(g.vertices, 1.0)
+	since = dict.fromkeys(g.vertices, 0.0)
+	# Heap entries are (time, version, v), current while v's version matches.
+	version = dict.fromkeys(g.vertices, 0)
+	heap = []
+	chosen = []
+
+	def current(v):
+		return weight[v] - (t - since[v]) * (g.degree(v) - 1)
+
+	# Record the weight of v now and its time of reaching zero.
+	def settle(v, w):
+		weight[v] = w
+		since[v] = t
+		version[v] += 1
+		d = g.degree(v)
+		if d >= 2:
+			heapq.heappush(heap, (t + w / (d - 1), version[v], v))
+
+	# Freeze the weights of v's neighbours, delete v, and queue the neighbours
+	# whose degree dropped to at most 2.
+	def delete(v, queue):
+		neighbours = [u for u in g.adj[v] if u != v]
+		for u in neighbours:
+			weight[u] = current(u)
+			since[u] = t
+		g.remove_vertex(v)
+		for u in neighbours:
+			settle(u, weight[u])
+			if g.degree(u) <= 2:
+				queue.append(u)
+
+	# The semidisjoint cycle through v, a vertex of degree 2, if there is one.
+	def semidisjoint_cycle(v) -> list:
+		cycle = [v]
+		ends = []
+		for first in g.adj[v]:
+			(prev, x) = (v, first)
+			while x != v and g.degree(x) == 2:
+				cycle.append(x)
+				(prev, x) = (x, next(u for u in g.adj[x] if u != prev or g.adj[x][u] == 2))
+			if x == v:
+				return cycle
+			ends.append(x)
+		if len(g.adj[v]) == 1:
+			# Both edges of v go to the same vertex.
+			return cycle + ends
+		if ends[0] == ends[1]:
+			return cycle + ends[:1]
+		return None
+
+	for v in g.vertices:
+		settle(v, 1.0)
+	queue = []
+	while g.vertices:
+		# Delete vertices on no cycle, and look for semidisjoint cycles.
+		cycle = None
+		while queue and cycle is None:
+			v = queue.pop()
+			if v not in g.vertices:
+				continue
+			if g.degree(v) <= 1:
+				delete(v, queue)
+			elif g.degree(v) == 2:
+				cycle = semidisjoint_cycle(v)
+		if not g.vertices:
+			break
+
+		if cycle is not None:
+			gamma = min(current(v) for v in cycle)
+			for v in cycle:
+				settle(v, current(v) - gamma)
+			zero = [v for v in cycle if weight[v] <= EPSILON]
+		else:
+			(when, stamp, v) = heapq.heappop(heap)
+			if v not in g.vertices or version[v] != stamp:
+				continue
+			t = max(t, when)
+			zero = [v]
+		for v in zero:
+			chosen.append(v)
+			delete(v, queue)
+
+	# Drop the vertices that are not needed, last chosen first.
+	forest = induced_forest(h, h.vertices.difference(chosen))
+	for v in reversed(chosen):
+		if not add_to_forest(h, forest, v):
+			soln.add(v)
+	return soln
+
+# Take a vertex of maximum degree (preferring one with parallel edges) until
+# the reductions have emptied G. Degrees never grow under the reductions, so a
+# heap with entries checked when popped finds it in O(log n).
+def degree_greedy_fvs(g: Graph) -> set:
+	original = g
+	g = g.copy()
+	soln = reduce_graph(g)
+
+	def key(v):
+		av = g.adj[v]
+		return (-g.degree(v), -sum(c - 1 for c in av.values()), v)
+
+	heap = [key(v) for v in g.vertices]
+	heapq.heapify(heap)
+	while g.vertices:
+		entry = heapq.heappop(heap)
+		v = entry[2]
+		if v not in g.vertices:
+			continue
+		if key(v) != entry:
+			heapq.heappush(heap, key(v))
+			continue
+		dirty = [u for u in g.adj[v] if u != v]
+		g.remove_vertex(v)
+		soln.add(v)
+		soln.update(reduce_graph(g, dirty))
+	return minimal_fvs(original, soln)
+
+# Improve an FVS S of G by destroy-and-repair rounds. Each round drops a random
+# vertex of S and up to `size` - 1 vertices of S near it, reduces what is left
+# of G once the rest of S is deleted, and finds a minimum FVS of that with
+# iterative compression. The kernel is small, as every cycle in it goes
+# through a dropped vertex. The new FVS is kept unless it is larger. Each round
+# takes near-linear time besides the exact repair, which is bounded in terms of
+# `size`. `seed` seeds the choice of vertices.
+def local_search(g: Graph, soln: set, rounds=16, size=5, seed=None) -> set:
+	rng = random.Random(seed)
+	soln = minimal_fvs(g, soln)
+	for _ in range(rounds):
+		if not soln:
+			break
+		s = rng.choice(sorted(soln))
+		dropped = {s}
+		frontier = [s]
+		# Breadth-first search from s, collecting the vertices of S it meets.
+		seen = {s}
+		while frontier and len(dropped) < size:
+			next_frontier = []
+			for v in frontier:
+				for u in g.adj[v]:
+					if u not in seen:
+						seen.add(u)
+						next_frontier.append(u)
+						if u in soln and len(dropped) < size:
+							dropped.add(u)
+			frontier = next_frontier
+
+		kept = soln.difference(dropped)
+		h = graph_minus(g, kept)
+		repair = reduce_graph(h)
+		rest = min_fvs_ic(h, len(dropped) - len(repair))
+		if rest is None:
+			continue
+		soln = minimal_fvs(g, kept | repair | rest)
+	return soln
+
+# The 2-approximation improved by local search.
+def local_search_fvs(g: Graph) -> set:
+	return local_search(g, two_approx_fvs(g))
+
+APPROXIMATIONS = {'2approx': two_approx_fvs, 'greedy': degree_greedy_fvs}
+
+# A small FVS of G (a NetworkX graph), found by one of APPROXIMATIONS and then
+# improved by `rounds` rounds of local_search.
+def approx_fvs(g, method='2approx', rounds=16, seed=None) -> set:
+	(g, labels) = from_networkx(g)
+	soln = APPROXIMATIONS[method](g)
+	if rounds:
+		soln = local_search(g, soln, rounds, seed=seed)
+	return relabel(soln, labels)
+
+# An FVS of G of size at most k if approx_fvs finds one, and None otherwise
+# (which does not mean there is none). `stats` and `budget` are accepted for
+# the benchmark runner: stats only records the time taken, and the FVS found is
+# reported to the budget, proven only if it is small enough.
+def fvs_via_approx(g, k: int, method='2approx', rounds=16, seed=None, stats=None, budget=None) -> set:
+	with phase(stats, 'search'):
+		soln = approx_fvs(g, method, rounds, seed)
+	if budget is not None:
+		budget.improve(soln)
+		budget.proven = len(soln) <= k
+		return soln
+	if len(soln) <= k:
+		return soln
+	return None
@@ -1,12 +1,25 @@
+import itertools
+import json
+import os
+import resource
 import time
 import multiprocessing as mp
 
-from multiprocessing import Pool
+from multiprocessing import connection as mp_connection
 
 from fvs import *
+from approx import fvs_via_approx, approx_fvs
 from generate import *
+from dataset import Dataset, load_instances
 
 TEN_MINUTES = 10*60 # seconds
+ANYTIME_GRACE = 30 # seconds
+
+# The workers of run_benchmark are forked from a server process that has only
+# loaded the solvers. A forked process inherits the peak RSS of its parent, so
+# forking them from the runner, with its instances loaded, would report those.
+WORKERS = mp.get_context('forkserver')
+WORKERS.set_forkserver_preload(['benchmark'])
 
 # Solve the given instance and return the time required to do so.
 def time_instance(g: MultiGraph, k: int, alg, n=1) -> (set, float):
@@ -16,22 +29,165 @@ def time_instance(g: MultiGraph, k: int, alg, n=1) -> (set, float):
 	end = time.process_time()
 	return (fvs, (end - start) / n)
 
-# Time a list of instances, waiting at most 10m for any single instance.
-# If an instance times out, its result is None.
-# graphs: [(MultiGraph, int)]
-# returns: [(fvs, time in seconds)]
-def time_all(graphs, alg) -> list:
-	with Pool(1) as p:
-		results = []
-		for (g, k) in graphs:
-			promise = p.apply_async(func=time_instance, args=(g, k, alg))
+# Solve one instance in a worker process of run_benchmark, and send its record
+# down `conn`. Peak RSS is that of the worker process (see WORKERS), in KiB.
+# With `seconds`, the solver runs anytime on a Budget of that many seconds.
+def _solve_instance(conn, g, k, alg, collect_stats, seconds=None):
+	start_wall = time.perf_counter()
+	start_cpu = time.process_time()
+	stats = SearchStats() if collect_stats else None
+	options = {}
+	if collect_stats:
+		options["stats"] = stats
+	if seconds is not None:
+		budget = Budget(seconds)
+		options["budget"] = budget
+	try:
+		fvs = alg(g, k, **options)
+		wall = time.perf_counter() - start_wall
+		cpu = time.process_time() - start_cpu
+		# An unproven anytime answer is the best FVS found, of any size.
+		proven = seconds is None or budget.proven
+		record = {
+			"status": "ok",
+			"found": fvs is not None,
+			"size": None if fvs is None else len(fvs),
+			"valid": None if fvs is None else ((len(fvs) <= k or not proven) and is_fvs(g, fvs)),
+			"wall": wall,
+			"cpu": cpu,
+		}
+		if seconds is not None:
+			record["proven"] = proven
+	except Exception as e:
+		record = {"status": "error", "error": repr(e)}
+		record["wall"] = time.perf_counter() - start_wall
+		record["cpu"] = time.process_time() - start_cpu
+	record["rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	if collect_stats:
+		record["stats"] = stats
+	conn.send(record)
+	conn.close()
+
+# The records of a JSON-lines results file, in file order. A line cut short by
+# a crash does not parse and is skipped, so its instance is run again.
+def read_records(results_file):
+	with open(results_file) as f:
+		for line in f:
 			try:
-				t = promise.get(TEN_MINUTES)
-				results.append(t)
-				print('.', flush=True, end='')
-			except mp.TimeoutError:
-				results.append(None)
-				print('x', flush=True, end='')
-
-		print("")
-		return results
+				record = json.loads(line)
+			except ValueError:
+				continue
+			if "instance" in record:
+				yield record
+
+# The numbers of the instances already recorded in a JSON-lines results file.
+def finished_instances(results_file) -> set:
+	if not os.path.exists(results_file):
+		return set()
+	return {record["instance"] for record in read_records(results_file)}
+
+# Cut off a last line left unterminated by a crash, so that appended records
+# start on a line of their own.
+def trim_partial_line(results_file):
+	if not os.path.exists(results_file):
+		return
+	with open(results_file, "rb+") as f:
+		f.seek(0, os.SEEK_END)
+		end = f.tell()
+		if end == 0:
+			return
+		f.seek(end - 1)
+		if f.read(1) == b"\n":
+			return
+		# Find the end of the last complete line.
+		pos = end
+		while pos > 0:
+			step = min(pos, 4096)
+			f.seek(pos - step)
+			chunk = f.read(step)
+			newline = chunk.rfind(b"\n")
+			if newline >= 0:
+				pos = pos - step + newline + 1
+				break
+			pos -= step
+		f.truncate(pos)
+
+# All records of a JSON-lines results file, ordered by instance number.
+def load_results(results_file) -> list:
+	return sorted(read_records(results_file), key=lambda r: r["instance"])
+
+# Run `alg` over a stream of (graph, k) instances (or a Dataset) on `workers` processes, each
+# instance in a fresh process that is killed if it runs for longer than
+# `timeout` seconds. One JSON record per instance is appended to `results_file`
+# as soon as it finishes, with fields instance (its position in the stream),
+# n, k, status ("ok", "timeout" or "error"), found, size, valid, wall and cpu
+# (seconds) and rss (peak KiB). With `collect_stats`, `alg` is also passed a
+# SearchStats, and the record gets its counters under stats. With `anytime`,
+# `alg` is given a Budget of `timeout` seconds instead, and is only killed if it
+# overruns that by ANYTIME_GRACE seconds. The record then has the best FVS
+# found when the budget ran out, and proven tells whether the answer is final.
+# Instances already in the file are skipped, so an interrupted run resumes
+# where it stopped.
+def run_benchmark(instances, alg, results_file, workers=1, timeout=TEN_MINUTES, collect_stats=False, anytime=False) -> int:
+	trim_partial_line(results_file)
+	done = finished_instances(results_file)
+	if hasattr(instances, '__len__'):
+		# Only build the instances that still have to be run (see Dataset).
+		pending = ((i, *instances[i]) for i in range(len(instances)) if i not in done)
+	else:
+		pending = ((i, g, k) for (i, (g, k)) in enumerate(instances) if i not in done)
+	running = {}
+	count = 0
+
+	with open(results_file, "a") as out:
+		def finish(conn, record):
+			(i, n, k, process, _) = running.pop(conn)
+			process.join()
+			conn.close()
+			record.update({"instance": i, "n": n, "k": k})
+			out.write(json.dumps(record, sort_keys=True) + "\n")
+			out.flush()
+			print('.' if record["status"] == "ok" else 'x', flush=True, end='')
+
+		while True:
+			for (i, g, k) in itertools.islice(pending, workers - len(running)):
+				(parent_conn, child_conn) = WORKERS.Pipe(duplex=False)
+				seconds = timeout if anytime else None
+				process = WORKERS.Process(target=_solve_instance, args=(child_conn, g, k, alg, collect_stats, seconds), daemon=True)
+				process.start()
+				child_conn.close()
+				kill_time = timeout + ANYTIME_GRACE if anytime else timeout
+				running[parent_conn] = (i, len(g), k, process, time.perf_counter() + kill_time)
+			if not running:
+				break
+
+			now = time.perf_counter()
+			deadline = min(d for (_, _, _, _, d) in running.values())
+			for conn in mp_connection.wait(list(running), max(0, deadline - now)):
+				try:
+					record = conn.recv()
+				except EOFError:
+					record = {"status": "error", "error": "worker died"}
+				finish(conn, record)
+				count += 1
+
+			now = time.perf_counter()
+			for (conn, (_, _, _, process, d)) in list(running.items()):
+				if d <= now:
+					process.kill()
+					finish(conn, {"status": "timeout", "wall": timeout})
+					count += 1
+
+	print("")
+	return count
+
+# Solve a list of instances with fvs_via_ic and count the compression rounds
+# each one needs, to compare warm starts and vertex orders (see fvs_via_ic).
+# returns: [(fvs, rounds)]
+def ic_rounds(graphs, **options) -> list:
+	results = []
+	for (g, k) in graphs:
+		stats = SearchStats()
+		fvs = fvs_via_ic(g, k, stats=stats, **options)
+		results.append((fvs, stats.get('rounds', 0)))
+	return results
@@ -0,0 +1,119 @@
+# Lower bounds on the size of an FVS, used to cut off searches that cannot
+# succeed within their budget.
+#
+# Both bounds allow a set of `fixed` vertices that may not be deleted (W in
+# fvs_disjoint, the forest F in mif), as long as they induce a forest:
+# 1. Cycle packing: cycles that share no deletable vertex each need a vertex of
+#    their own in the FVS. Short cycles are packed greedily.
+# 2. Degree bound: a forest on n' vertices has fewer than n' edges, so deleting
+#    an FVS X must remove at least m - n + |X| edges. A vertex v removes at most
+#    deg(v) of them, so the sum of deg(v) - 1 over X is at least m - n.
+
+from graph import Graph, undo
+
+# The smallest number of deletable vertices whose degrees can account for the
+# m - n edges an FVS has to remove. Degrees are counted into buckets rather
+# than sorted, so this takes O(n).
+def degree_bound(g: Graph, fixed=()) -> int:
+	excess = g.m - len(g)
+	if excess <= 0:
+		return 0
+	buckets = {}
+	deletable = 0
+	for v in g.vertices:
+		if v not in fixed:
+			deletable += 1
+			d = g.degree(v)
+			if d >= 2:
+				buckets[d] = buckets.get(d, 0) + 1
+	count = 0
+	for d in sorted(buckets, reverse=True):
+		# Each of these vertices removes up to d - 1 of the excess edges.
+		needed = -(-excess // (d - 1))
+		if needed <= buckets[d]:
+			return count + needed
+		count += buckets[d]
+		excess -= buckets[d] * (d - 1)
+	# Even deleting every deletable vertex would not do.
+	return deletable + 1
+
+# Greedily pack cycles of G that pairwise share no deletable vertex, stopping
+# once `limit` have been found. Vertices on no cycle are stripped, then loops,
+# double edges, and otherwise the first cycle closed by a breadth-first search
+# from a vertex of maximum degree are taken. The vertices are deleted from G
+# itself and restored from a trail afterwards, so G is left unchanged without
+# being copied. Returns the cycles as lists of vertices.
+def cycle_packing(g: Graph, fixed=(), limit=None) -> list:
+	outer_trail = g.trail
+	g.trail = []
+	try:
+		return pack_cycles(g, fixed, limit)
+	finally:
+		undo(g.trail, 0)
+		g.trail = outer_trail
+
+def pack_cycles(g: Graph, fixed, limit) -> list:
+	cycles = []
+	queue = list(g.vertices)
+	while limit is None or len(cycles) < limit:
+		# Strip vertices of degree <= 1.
+		while queue:
+			v = queue.pop()
+			if v in g.vertices and g.degree(v) <= 1:
+				queue.extend(g.adj[v])
+				g.remove_vertex(v)
+		if not g.vertices:
+			break
+
+		cycle = short_cycle(g)
+		cycles.append(cycle)
+		for v in cycle:
+			if v not in fixed:
+				queue.extend(g.adj[v])
+				g.remove_vertex(v)
+	return cycles
+
+# A short cycle of G, a graph in which every vertex has degree >= 2.
+def short_cycle(g: Graph) -> list:
+	for v in g.vertices:
+		for (u, c) in g.adj[v].items():
+			if u == v:
+				return [v]
+			if c >= 2:
+				return [v, u]
+
+	s = max(g.vertices, key=g.degree)
+	parent = {s: None}
+	frontier = [s]
+	while frontier:
+		next_frontier = []
+		for x in frontier:
+			for y in g.adj[x]:
+				if y == parent[x]:
+					continue
+				if y in parent:
+					# The tree paths from x and y meet at their lowest common ancestor.
+					ancestors = []
+					z = x
+					while z is not None:
+						ancestors.append(z)
+						z = parent[z]
+					depth = {a: i for (i, a) in enumerate(ancestors)}
+					cycle = []
+					z = y
+					while z not in depth:
+						cycle.append(z)
+						z = parent[z]
+					return ancestors[:depth[z] + 1] + cycle[::-1]
+				parent[y] = x
+				next_frontier.append(y)
+		frontier = next_frontier
+	assert False, "No cycle in a graph of minimum degree 2"
+
+# A lower bound on the size of an FVS of G avoiding `fixed`. The cycle packing
+# stops once it reaches `limit`, if given.
+def lower_bound(g: Graph, fixed=(), limit=None) -> int:
+	bound = degree_bound(g, fixed)
+	if limit is not None and bound >= limit:
+		return bound
+	return max(bound, len(cycle_packing(g, fixed, limit)))
@@ -0,0 +1,82 @@
+# Memoization of search subproblems, shared by the calls of a solver that are
+# given the same SearchCache.
+#
+# Keys describe a search state by the vertices fixed so far, the budget and
+# the graph's edge_hash (see graph.py), which the graph keeps up to date, so a
+# lookup does not read the edges. An entry also keeps the edges of its graph
+# (with its vertex numbering), and a hit is only taken after checking them
+# against the graph looked up, so it is never a false positive, and results
+# stay valid across solver calls on graphs with the same numbering. Both
+# solutions and proven NO answers (None) are stored. The least recently used
+# entries are evicted once the estimated size of the cache exceeds its memory
+# cap.
+
+import sys
+from collections import OrderedDict
+
+from graph import Graph
+
+# The edges of G as a frozenset of (u, v, multiplicity) with u <= v, which
+# entries keep to check their hits.
+def edge_key(g: Graph) -> frozenset:
+	return frozenset((u, v, c) for u in g.vertices for (v, c) in g.adj[u].items() if u <= v)
+
+# Rough size in bytes of a key or value made of tuples, sets and integers.
+def _size(obj) -> int:
+	size = sys.getsizeof(obj)
+	if isinstance(obj, (tuple, set, frozenset)):
+		size += sum(_size(x) for x in obj)
+	return size
+
+class SearchCache():
+	def __init__(self, max_bytes=256 * 2**20):
+		self.max_bytes = max_bytes
+		self.bytes = 0
+		self.entries = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+		# Hash collisions caught by the check of the edges.
+		self.collisions = 0
+
+	def __len__(self):
+		return len(self.entries)
+
+	def __repr__(self):
+		return "SearchCache({} entries, {} bytes, {} hits, {} misses)".format(
+			len(self), self.bytes, self.hits, self.misses)
+
+	# Returns (True, value) if `key` is cached, and (False, None) otherwise.
+	# With G, the edges stored with the entry must also be those of G.
+	def lookup(self, key, g: Graph = None) -> (bool, object):
+		entry = self.entries.get(key)
+		if entry is not None and g is not None and entry[2] != edge_key(g):
+			self.collisions += 1
+			entry = None
+		if entry is None:
+			self.misses += 1
+			return (False, None)
+		self.hits += 1
+		self.entries.move_to_end(key)
+		return (True, entry[0])
+
+	# Cache `value` under `key`, with the edges (see edge_key) of the graph of
+	# the search state, if the key has its edge_hash.
+	def store(self, key, value, edges=None):
+		size = _size(key) + _size(value) + _size(edges)
+		if size > self.max_bytes:
+			return
+		old = self.entries.pop(key, None)
+		if old is not None:
+			self.bytes -= old[1]
+		self.entries[key] = (value, size, edges)
+		self.bytes += size
+		while self.bytes > self.max_bytes:
+			(_, (_, evicted, _)) = self.entries.popitem(last=False)
+			self.bytes -= evicted
+
+	def clear(self):
+		self.entries.clear()
+		self.bytes = 0
+		self.hits = 0
+		self.misses = 0
+		self.collisions = 0
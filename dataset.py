@@ -0,0 +1,242 @@
+# Compact binary datasets of FVS instances, read through a memory map.
+#
+# The pickled data sets (generate.to_disk) have to be unpickled whole before
+# any instance can be used. A binary dataset is laid out so that one instance
+# can be read without touching the others, and so that processes reading the
+# same file share its pages. All integers are little-endian:
+#
+# * Header (24 bytes): the magic b"FVSGRAPH", the format version (u32), the
+#   number of instances (u32) and the position of the offset table (u64).
+# * Instances, each starting on a 4-byte boundary: n, k and m (u32), then the
+#   edges in CSR form: indptr (n + 1 u32) and indices (m u32), where
+#   indices[indptr[u]:indptr[u + 1]] lists the ends v >= u of the edges at u,
+#   with parallel edges repeated.
+# * The offset table: the position of each instance (u64), then the end of the
+#   last one.
+#
+# The offset table comes last so that a DatasetWriter can stream instances to
+# disk without knowing how many there will be. Graphs on the vertices 0 .. n-1
+# keep their numbering, and others are numbered in the order of their nodes.
+
+import argparse
+import mmap
+import pickle
+import struct
+import sys
+from array import array
+
+from networkx import MultiGraph
+
+MAGIC = b"FVSGRAPH"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQ")
+INSTANCE = struct.Struct("<III")
+
+assert sys.byteorder == "little", "Binary datasets are read with native byte order"
+
+# Writes instances to a binary dataset one at a time. Use as a context manager,
+# or call close() to write the offset table and header.
+class DatasetWriter():
+	def __init__(self, filename):
+		self.file = open(filename, "wb")
+		self.file.write(bytes(HEADER.size))
+		self.offsets = []
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def __len__(self):
+		return len(self.offsets)
+
+	# Add an instance given as a graph with the minimum FVS size k.
+	def add(self, g, k: int):
+		nodes = list(g.nodes())
+		if set(nodes) == set(range(len(nodes))):
+			nodes = range(len(nodes))
+		index = {v: i for (i, v) in enumerate(nodes)}
+		ends = [[] for _ in index]
+		for (u, v) in g.edges():
+			(u, v) = (index[u], index[v])
+			if u > v:
+				(u, v) = (v, u)
+			ends[u].append(v)
+		indptr = [0]
+		indices = []
+		for vs in ends:
+			vs.sort()
+			indices.extend(vs)
+			indptr.append(len(indices))
+		self.add_csr(len(index), k, array("I", indptr), array("I", indices))
+
+	# Add an instance given by its CSR arrays (see above), as objects with the
+	# buffer protocol holding u32 values, such as array('I') or numpy arrays.
+	def add_csr(self, n: int, k: int, indptr, indices):
+		indptr = memoryview(indptr).cast("B")
+		indices = memoryview(indices).cast("B")
+		assert len(indptr) == 4 * (n + 1), "indptr must hold n + 1 u32 values"
+		self.offsets.append(self.file.tell())
+		self.file.write(INSTANCE.pack(n, k, len(indices) // 4))
+		self.file.write(indptr)
+		self.file.write(indices)
+
+	def close(self):
+		if self.file.closed:
+			return
+		end = self.file.tell()
+		self.file.write(struct.pack("<{}Q".format(len(self.offsets) + 1), *self.offsets, end))
+		self.file.seek(0)
+		self.file.write(HEADER.pack(MAGIC, VERSION, len(self.offsets), end))
+		self.file.close()
+
+# Write a list of (graph, k) instances as a binary dataset.
+def write_dataset(instances, filename):
+	with DatasetWriter(filename) as writer:
+		for (g, k) in instances:
+			writer.add(g, k)
+
+# A binary dataset, indexed like the list of (MultiGraph, k) instances it was
+# made from. Instances are only built when asked for. A Dataset is pickled as
+# its file name, so worker processes map the same file instead of copying it.
+class Dataset():
+	def __init__(self, filename):
+		self.filename = filename
+		with open(filename, "rb") as f:
+			self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+		(magic, version, count, table) = HEADER.unpack_from(self.map, 0)
+		if magic != MAGIC or version != VERSION:
+			raise ValueError("{} is not a binary dataset of version {}".format(filename, VERSION))
+		self.count = count
+		self.offsets = memoryview(self.map)[table:table + 8 * (count + 1)].cast("Q")
+
+	def __getstate__(self):
+		return self.filename
+
+	def __setstate__(self, filename):
+		self.__init__(filename)
+
+	def __len__(self):
+		return self.count
+
+	def __iter__(self):
+		for i in range(self.count):
+			yield self[i]
+
+	def __getitem__(self, i):
+		if isinstance(i, slice):
+			return [self[j] for j in range(*i.indices(self.count))]
+		return (self.graph(i), self.k(i))
+
+	def _index(self, i) -> int:
+		if i < 0:
+			i += self.count
+		if not 0 <= i < self.count:
+			raise IndexError("Dataset index out of range")
+		return i
+
+	# (n, k, m) of instance i, read without building the graph.
+	def header(self, i) -> (int, int, int):
+		return INSTANCE.unpack_from(self.map, self.offsets[self._index(i)])
+
+	def order(self, i) -> int:
+		return self.header(i)[0]
+
+	def k(self, i) -> int:
+		return self.header(i)[1]
+
+	# The CSR arrays of instance i, as views into the mapped file.
+	def csr(self, i) -> (memoryview, memoryview):
+		(n, _, m) = self.header(i)
+		start = self.offsets[self._index(i)] + INSTANCE.size
+		view = memoryview(self.map)
+		indptr = view[start:start + 4 * (n + 1)].cast("I")
+		indices = view[start + 4 * (n + 1):start + 4 * (n + 1 + m)].cast("I")
+		return (indptr, indices)
+
+	def edges(self, i) -> list:
+		(indptr, indices) = self.csr(i)
+		return [(u, indices[j]) for u in range(len(indptr) - 1) for j in range(indptr[u], indptr[u + 1])]
+
+	def graph(self, i) -> MultiGraph:
+		g = MultiGraph()
+		g.add_nodes_from(range(self.order(i)))
+		g.add_edges_from(self.edges(i))
+		return g
+
+	def close(self):
+		self.offsets.release()
+		self.map.close()
+
+# Is `filename` a binary dataset (rather than a pickle)?
+def is_dataset(filename) -> bool:
+	with open(filename, "rb") as f:
+		return f.read(len(MAGIC)) == MAGIC
+
+# Graphs pickled by NetworkX 1.x (as in data/) keep their adjacency in the
+# `node`, `adj` and `edge` attributes, which later versions shadow with views
+# of attributes the old pickle lacks. Such a graph is rebuilt from the raw
+# adjacency in its state, and any other graph is returned as it is.
+def upgrade_graph(g):
+	state = g.__dict__
+	if "_adj" in state or not isinstance(state.get("adj"), dict):
+		return g
+	h = type(g)()
+	h.graph.update(state.get("graph", {}))
+	for (v, attrs) in state.get("node", dict.fromkeys(state["adj"], {})).items():
+		h.add_node(v, **attrs)
+	seen = set()
+	for (u, neighbours) in state["adj"].items():
+		for (v, data) in neighbours.items():
+			# A multigraph maps each neighbour to {key: attributes}.
+			edges = data.items() if h.is_multigraph() else [(None, data)]
+			for (key, attrs) in edges:
+				if (v, u, key) in seen:
+					continue
+				seen.add((u, v, key))
+				if key is None:
+					h.add_edge(u, v, **attrs)
+				else:
+					h.add_edge(u, v, key=key, **attrs)
+	return h
+
+# Unpickle a list of (graph, k) instances (see generate.to_disk), upgrading
+# graphs pickled by older versions of NetworkX.
+def load_pickle(filename) -> list:
+	with open(filename, "rb") as f:
+		return [(upgrade_graph(g), k) for (g, k) in pickle.load(f)]
+
+# The instances in a data file of either format: a Dataset for a binary file,
+# and the unpickled list otherwise.
+def load_instances(filename):
+	if is_dataset(filename):
+		return Dataset(filename)
+	return load_pickle(filename)
+
+# Convert a pickled list of instances (see generate.to_disk) into a binary
+# dataset.
+def pickle_to_dataset(pickle_file, dataset_file):
+	write_dataset(load_pickle(pickle_file), dataset_file)
+
+# Convert a binary dataset back into a pickled list of instances.
+def dataset_to_pickle(dataset_file, pickle_file):
+	dataset = Dataset(dataset_file)
+	with open(pickle_file, "wb") as f:
+		pickle.dump(list(dataset), f)
+	dataset.close()
+
+# Convert a data file to the other format.
+def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("source", help="pickled or binary data file")
+	parser.add_argument("target", help="file to write in the other format")
+	args = parser.parse_args()
+
+	if is_dataset(args.source):
+		dataset_to_pickle(args.source, args.target)
+	else:
+		pickle_to_dataset(args.source, args.target)
+
+if __name__ == "__main__":
+	main()
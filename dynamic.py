@@ -0,0 +1,151 @@
+# An FVS maintained under updates to its graph.
+#
+# Iterative compression adds one vertex at a time and compresses. A
+# DynamicFVS does the same for arbitrary updates: each update changes the
+# minimum FVS size by at most one, so a known FVS S of the old graph gives an
+# FVS of the new graph of size at most |S| + 1 (adding an edge or vertex), or
+# a candidate for compressing by one (removing one). Only the connected
+# component where the update happened is compressed, with a single
+# ic_compression step.
+#
+# Updates that cannot create a cycle outside S take no search at all: edges
+# touching S, edges joining two trees of G - S (looked up in a DisjointSet of
+# G - S), new isolated vertices, and removals of vertices of S.
+
+from fvs import *
+
+class DynamicFVS():
+	# Start from the NetworkX graph `g` (or an empty graph). Without k, the
+	# solution is kept minimum. With k, it is only kept within k: removals
+	# then take no work, and the solution is larger than k exactly when every
+	# FVS is, in which case it is kept minimum as well. `search` picks the
+	# fvs_disjoint traversal of the compressions.
+	def __init__(self, g=None, k=None, search='dfs'):
+		self.k = k
+		self.search = search
+		if g is None:
+			(self.g, self.labels) = (Graph(), [])
+		else:
+			(self.g, self.labels) = from_networkx(g)
+			self.labels = list(range(len(self.g))) if self.labels is None else self.labels
+		self.index = {label: v for (v, label) in enumerate(self.labels)}
+		if k is None:
+			self.soln = min_fvs_ic(self.g, len(self.g), (None, None, None, search))
+		else:
+			self.soln = iterative_compression(self.g, k, None, (None, None, None, search))
+			if self.soln is None:
+				self.soln = min_fvs_ic(self.g, len(self.g), (None, None, None, search))
+		# The components of G - S, or None until they are next needed.
+		self.forest = None
+
+	def __len__(self):
+		return len(self.soln)
+
+	def __contains__(self, label):
+		return label in self.index and self.index[label] in self.soln
+
+	# The current FVS, in the labels of the graph.
+	@property
+	def solution(self) -> set:
+		return {self.labels[v] for v in self.soln}
+
+	def add_vertex(self, label):
+		if label in self.index:
+			return
+		v = self.g.add_vertex()
+		self.labels.append(label)
+		self.index[label] = v
+		if self.forest is not None:
+			self.forest.add(v)
+
+	def remove_vertex(self, label):
+		v = self.index.pop(label)
+		self.labels[v] = None
+		neighbours = [u for u in self.g.adj[v] if u != v]
+		self.g.remove_vertex(v)
+		if v in self.soln:
+			# S - v is an FVS of G - v, and removing v lowers the minimum by at
+			# most one.
+			self.soln.remove(v)
+			return
+		self.forest = None
+		self._shrink(neighbours)
+
+	# Add an edge, adding its ends as vertices if they are new.
+	def add_edge(self, u, v):
+		self.add_vertex(u)
+		self.add_vertex(v)
+		(u, v) = (self.index[u], self.index[v])
+		if u in self.soln or v in self.soln:
+			self.g.add_edge(u, v)
+			return
+		# The forest of G - S before the edge.
+		forest = self._forest()
+		self.g.add_edge(u, v)
+		if u != v and forest.union(u, v):
+			return
+
+		# The edge closes a cycle in G - S: take an end, then try to compress.
+		x = max((u, v), key=self.g.degree)
+		self.soln.add(x)
+		self.forest = None
+		if self.k is not None and len(self.soln) == self.k + 1:
+			# S need not be minimum in any component, so compress all of it.
+			smaller = ic_compression(self.g, self.soln, self.k, search=self.search)
+			if smaller is not None:
+				self.soln = smaller
+		elif self.k is None or len(self.soln) > self.k:
+			self._compress(self._component(x))
+
+	def remove_edge(self, u, v):
+		(u, v) = (self.index[u], self.index[v])
+		self.g.remove_edge(u, v)
+		if u not in self.soln and v not in self.soln:
+			self.forest = None
+		self._shrink([u, v])
+
+	# The DisjointSet of G - S, rebuilt if it is out of date.
+	def _forest(self) -> DisjointSet:
+		if self.forest is None:
+			self.forest = induced_forest(self.g, self.g.vertices.difference(self.soln))
+		return self.forest
+
+	# After a removal next to `touched`, look for an FVS one smaller, unless
+	# the solution only needs to stay within k. The removal may have split a
+	# component, and only one of the parts can have a smaller FVS.
+	def _shrink(self, touched):
+		if not self.soln or (self.k is not None and len(self.soln) <= self.k):
+			return
+		seen = set()
+		for u in touched:
+			if u in seen or u not in self.g.vertices:
+				continue
+			component = self._component(u)
+			seen.update(component)
+			if self._compress(component):
+				return
+
+	# Compress S within a connected component of G to an FVS of the component
+	# that is one smaller, if there is one. Returns True if S shrank.
+	def _compress(self, component: set) -> bool:
+		z = self.soln.intersection(component)
+		if not z:
+			return False
+		smaller = ic_compression(self.g.subgraph(component), z, len(z) - 1, search=self.search)
+		if smaller is None:
+			return False
+		self.soln = self.soln.difference(z).union(smaller)
+		self.forest = None
+		return True
+
+	# The vertices of the connected component of G containing x.
+	def _component(self, x) -> set:
+		seen = {x}
+		stack = [x]
+		while stack:
+			v = stack.pop()
+			for u in self.g.adj[v]:
+				if u not in seen:
+					seen.add(u)
+					stack.append(u)
+		return seen
@@ -1,275 +1,996 @@
+import heapq
 import itertools
+import math
+from contextlib import nullcontext
 import networkx as nx
-import networkx.algorithms.components.connected as nxc
-import networkx.algorithms.cycles as cyc
 
 from networkx import MultiGraph
-from networkx.algorithms.tree import is_forest
+from graph import Graph, DisjointSet, is_forest, connected_components, from_networkx, relabel, undo
+from graph import induced_forest, closes_cycle, add_to_forest
+from graph import biconnected_components, canonical_form
+from parallel import SearchPool, Incumbent, Budget, cancelled
+from kernel import kernelize, lift
+from bounds import lower_bound
+from cache import SearchCache, edge_key
+from stats import SearchStats, phase
+from verify import is_fvs
 
-# Original (unused) code for G - W.
-def graph_minus_slow(g: MultiGraph, w: set) -> MultiGraph:
-	gx = g.copy()
-	gx.remove_nodes_from(w)
-	return gx
+# The solvers below run on the compact `Graph` from graph.py, with vertices
+# numbered 0 .. n-1. The public entry points (`fvs_via_ic`, `fvs_via_mif` and
+# `mif`) also accept NetworkX graphs, converting them on the way in and
+# translating vertex labels on the way out. `is_fvs` (from verify.py) reads
+# either kind of graph as it is.
 
-# Optimised code for G - W (yields an approx 2x speed-up).
-def graph_minus(g: MultiGraph, w: set) -> MultiGraph:
-	gx = MultiGraph()
-	for (n1, n2) in g.edges():
-		if n1 not in w and n2 not in w:
-			gx.add_edge(n1, n2)
-	for n in g.nodes():
-		if n not in w:
-			gx.add_node(n)
+# G - W, as a new graph. Costs one copy plus O(deg) per deleted vertex.
+def graph_minus(g: Graph, w: set) -> Graph:
+	gx = g.copy()
+	gx.remove_vertices(w)
 	return gx
 
-def is_fvs(g: MultiGraph, w) -> bool:
-	h = graph_minus(g, w)
-	return ((len(h) == 0) or is_forest(h))
-
-def is_independent_set(g: MultiGraph, f: set) -> bool:
-	for edge in itertools.combinations(f, 2):
-		if g.has_edge(edge[0], edge[1]):
-			return False
+def is_independent_set(g: Graph, f: set) -> bool:
+	for v in f:
+		for u in g.adj[v]:
+			if u != v and u in f:
+				return False
 	return True
 
-# Note: Reduction functions return (k, new, changed) and mutate their graph arguments (G and H)!
+# Note: Reduction functions return (k, new, touched) and mutate G!
+# Each reduction looks at a single vertex v of G. W is a DisjointSet holding the
+# components of the forest G[W], and H = G - W is read off G and W. If the
+# reduction applies, v is deleted and `touched` lists the vertices whose
+# neighbourhood changed as a result; otherwise `touched` is None.
 
-# Delete all vertices of degree 0 or 1 (as they can't be part of any cycles).
-def reduction1(g: MultiGraph, w: set, h: MultiGraph, k: int) -> (int, int, bool):
-	changed = False
-	for v in g.nodes():
-		if g.degree(v) <= 1:
-			g.remove_node(v)
-			h.remove_nodes_from([v])
-			changed = True
-	return (k, None, changed)
+# Delete a vertex of degree 0 or 1 (as it can't be part of any cycles).
+def reduction1(g: Graph, w: DisjointSet, k: int, v) -> (int, int, list):
+	if g.degree(v) <= 1:
+		touched = list(g.adj[v])
+		g.remove_vertex(v)
+		return (k, None, touched)
+	return (k, None, None)
 
 # If there exists a vertex v in H such that G[W ∪ {v}]
 # contains a cycle, then include v in the solution, delete v and decrease the
 # parameter by 1. That is, the new instance is (G - {v}, W, k - 1).
 # If v introduces a cycle, it must be part of X as none of the vertices in W
 # will be available to neutralise this cycle.
-def reduction2(g: MultiGraph, w: set, h: MultiGraph, k: int) -> (int, int, bool):
-	for v in h.nodes():
-		# Check if G[W ∪ {v}] contains a cycle.
-		if not is_forest(g.subgraph(w.union({v}))):
-			g.remove_node(v)
-			h.remove_nodes_from([v])
-			return (k - 1, v, True)
-	return (k, None, False)
+# Since G[W] is a forest, this is the case exactly when v has two edges into the
+# same component of G[W] (or a self-loop).
+def reduction2(g: Graph, w: DisjointSet, k: int, v) -> (int, int, list):
+	# Check if G[W ∪ {v}] contains a cycle.
+	if v not in w and closes_cycle(g, w, v):
+		touched = [u for u in g.adj[v] if u != v]
+		g.remove_vertex(v)
+		return (k - 1, v, touched)
+	return (k, None, None)
 
 # If there is a vertex v ∈ V (H) of degree 2 in G such
 # that at least one neighbor of v in G is from V (H), then delete this vertex
 # and make its neighbors adjacent (even if they were adjacent before; the graph
 # could become a multigraph now).
-def reduction3(g: MultiGraph, w: set, h: MultiGraph, k: int) -> (int, int, bool):
-	for v in h.nodes():
-		if g.degree(v) == 2:
-			# If v has a neighbour in H, short-curcuit it.
-			if len(h[v]) >= 1:
-				# Delete v and make its neighbors adjacent.
-				[n1, n2] = g.neighbors(v)
-				g.remove_node(v)
-				g.add_edge(n1, n2)
-				# Update H accordingly.
-				h.remove_nodes_from([v])
-				if n1 not in w and n2 not in w:
-					h.add_edge(n1, n2)
-				return (k, None, True)
-	return (k, None, False)
-
-# Exhaustively apply reductions.
-# This function owns G.
-def apply_reductions(g: MultiGraph, w: set, k: int) -> (int, set):
-	# Current H.
-	h = graph_minus(g, w)
+def reduction3(g: Graph, w: DisjointSet, k: int, v) -> (int, int, list):
+	if v not in w and g.degree(v) == 2 and not g.has_loop(v):
+		# If v has a neighbour in H, short-curcuit it.
+		if any(u not in w for u in g.adj[v]):
+			# Delete v and make its neighbors adjacent.
+			return (k, None, list(g.contract(v)))
+	return (k, None, None)
+
+# Exhaustively apply reductions, using a worklist of vertices to (re-)examine.
+# `dirty` holds the vertices that might be reducible (default: all of G); when a
+# reduction fires, only the vertices it touched are queued again, so chains of
+# reductions are followed in a single pass.
+# This function mutates G (recording the changes on G's trail, if any).
+def apply_reductions(g: Graph, w: DisjointSet, k: int, dirty=None, stats=None) -> (int, set):
+	if dirty is None:
+		dirty = g.vertices
+	queue = list(dirty)
+	queued = set(queue)
 
 	# Set of vertices included in the solution as a result of reductions.
 	x = set()
-	while True:
-		reduction_applied = False
+	while queue:
+		v = queue.pop()
+		queued.discard(v)
+		if v not in g.vertices:
+			continue
+
 		for f in [reduction1, reduction2, reduction3]:
-			(k, solx, changed) = f(g, w, h, k)
+			(k, solx, touched) = f(g, w, k, v)
 
-			if changed:
-				reduction_applied = True
+			if touched is not None:
+				if stats is not None:
+					stats.count(f.__name__)
 				if solx != None:
 					x.add(solx)
+				for u in touched:
+					if u not in queued:
+						queued.add(u)
+						queue.append(u)
+				break
+
+	return (k, x)
 
-		if not reduction_applied:
-			return (k, x)
+# The vertices whose reductions may have been enabled by x joining W: the
+# H-neighbours of the component of G[W] containing x (x's neighbours included).
+def forest_neighbourhood(g: Graph, w: DisjointSet, x) -> set:
+	seen = {x}
+	stack = [x]
+	result = set()
+	while stack:
+		v = stack.pop()
+		for u in g.adj[v]:
+			if u not in w:
+				result.add(u)
+			elif u not in seen:
+				seen.add(u)
+				stack.append(u)
+	return result
 
 # Given a graph G and a FVS W of size at least (k + 1), is it possible to construct
 # a FVS X of size at most k using only the vertices of G - W?
-# This function owns G and can mutate it freely.
-def fvs_disjoint(g: MultiGraph, w: set, k: int) -> set:
-	# Check that G[W] is a forest.
+# `search` is the traversal of the search tree (see DISJOINT_SEARCHES). `path`
+# optionally fixes the branches taken at the top levels of the search (see
+# disjoint_dfs), `memo` is an optional SearchCache for its states and `stats`
+# an optional SearchStats. G is left unchanged.
+def fvs_disjoint(g: Graph, w: set, k: int, path=(), memo=None, stats=None, search='dfs') -> set:
+	# Check that G[W] is a forest, tracking its components.
 	# If it isn't, then a solution X not using W can't remove W's cycles.
-	if not is_forest(g.subgraph(w)):
+	forest = induced_forest(g, w)
+	if forest is None:
 		return None
 
-	# Apply reductions exhaustively.
-	k, soln_redux = apply_reductions(g, w, k)
+	if search == 'best':
+		return disjoint_best_first(g.copy(), forest, k, path, memo, stats)
 
-	# If k becomes negative, it indicates that the reductions included
-	# more than k vertices, hence no solution of size <= k exists.
-	if k < 0:
-		return None
+	# Search on G itself, undoing changes via the trail instead of copying G.
+	outer_trail = g.trail
+	g.trail = forest.trail = []
+	if search == 'dfs':
+		(soln, _) = disjoint_dfs(g, forest, k, path, memo, stats)
+	elif search == 'iddfs':
+		# Deepen until a solution is found or no node was cut off.
+		limit = k + 1
+		while True:
+			(soln, complete) = disjoint_dfs(g, forest, k, path, memo, stats, limit)
+			if soln is not None or complete:
+				break
+			limit *= 2
+	else:
+		raise ValueError("Unknown search {}".format(search))
+	g.trail = outer_trail
+	return soln
+
+# Traversals of the fvs_disjoint search tree. Depth-first search keeps one
+# state, undoing its changes on backtracking, and a stack of O(depth) entries.
+# Iterative deepening repeats it with a doubling limit on the number of
+# branching steps, finding solutions near the root first in the same memory.
+# Best-first search keeps a copy of the graph for every open node, expanding
+# the one with the most budget to spare over its lower bound first.
+DISJOINT_SEARCHES = ['dfs', 'iddfs', 'best']
+
+# The number of levels of disjoint_dfs between checks of the lower bound.
+BOUND_INTERVAL = 2
+
+# The vertex of H = G - W to branch on: one with at most one edge in H, which
+# exists as H is a forest after the reductions.
+def branching_vertex(g: Graph, w: DisjointSet):
+	for v in g.vertices:
+		if v in w:
+			continue
+		av = g.adj[v]
+		if sum(c for (u, c) in av.items() if u not in w) + av.get(v, 0) <= 1:
+			return v
+	assert False, "No branching vertex in a forest"
 
-	# If G has been reduced to nothing and k is >= 0 then the solution generated by the reductions
-	# is already optimal.
-	if len(g) == 0:
-		return soln_redux
-
-	# Find an x in H of degree at most 1.
-	h = graph_minus(g, w)
-	x = None
-	for v in h.nodes():
-		if h.degree(v) <= 1:
-			x = v
+# The memo key of a reduced state (G, W, k), with G by its edge_hash.
+def disjoint_key(g: Graph, w: DisjointSet, k: int) -> tuple:
+	return ('disjoint', k, frozenset(v for v in w.parent if v in g.vertices), g.edge_hash)
+
+# Depth-first branch-and-reduce search behind fvs_disjoint, on an explicit stack.
+# At each node, the reductions are applied and a vertex x of H with at most
+# one edge in H is found. The left child takes x into the solution and the
+# right child adds it to W (G[W ∪ {x}] is still a forest, as otherwise
+# reduction 2 would have removed x). Every change to G and W is recorded on G's
+# trail, and a stack entry holds the trail length of its parent's state, so
+# backtracking is an undo and the search shares a single copy of G. Only the
+# vertices affected by a branching step (`dirty`) can have become reducible.
+# If `path` is non-empty, its i-th entry restricts the nodes at depth i to the
+# left (True) or right (False) branch. With a `memo`, the outcome of branching
+# on each reduced state (G, W, k) is cached, unless it was cut short by the
+# path, a cancellation or the depth `limit`. Returns (X, complete), where
+# complete is False if nodes were cut off at the depth limit.
+def disjoint_dfs(g: Graph, w: DisjointSet, k: int, path=(), memo=None, stats=None, limit=None) -> (set, bool):
+	trail = g.trail
+	root = len(trail)
+	cuts = 0
+
+	# Nodes are ('node', mark, k, soln, depth, x, take): the state at trail
+	# length `mark`, with x taken into the solution (take) or added to W, and
+	# `soln` the solution so far. The root has x = None. Below the children of
+	# a node, ('done', key, soln, cuts, mark) marks the end of its subtree, with
+	# the node's reduced state at trail length `mark`, which is restored to
+	# store it.
+	stack = [('node', root, k, set(), 0, None, None)]
+	soln = None
+	while stack:
+		# Give up if a parallel search has already been answered elsewhere.
+		if cancelled():
+			undo(trail, root)
+			return (None, True)
+
+		entry = stack.pop()
+		if entry[0] == 'done':
+			(_, key, _, node_cuts, mark) = entry
+			if cuts == node_cuts:
+				undo(trail, mark)
+				memo.store(key, None, edge_key(g))
+			continue
+
+		(_, mark, k, soln, depth, x, take) = entry
+		undo(trail, mark)
+		if x is None:
+			dirty = g.vertices
+		elif take:
+			dirty = [u for u in g.adj[x] if u != x]
+			g.remove_vertex(x)
+			k -= 1
+			soln = soln.union({x})
+		else:
+			add_to_forest(g, w, x)
+			dirty = forest_neighbourhood(g, w, x)
+		if stats is not None:
+			stats.count('nodes')
+			stats.reach(depth + 1)
+
+		# Apply reductions exhaustively. If k becomes negative, the reductions
+		# included more than k vertices, so there is no solution here.
+		(k, soln_redux) = apply_reductions(g, w, k, dirty, stats)
+		if k < 0:
+			continue
+		if soln_redux:
+			soln = soln.union(soln_redux)
+
+		# If G has been reduced to nothing, the solution is complete.
+		if len(g) == 0:
 			break
-	assert x is not None
 
-	# Branch.
-	# G is copied in the left branch (as it is modified), but passed directly in the right.
-	soln_left = fvs_disjoint(graph_minus(g, {x}), w, k - 1)
+		# Cut off the search if H cannot be solved within the remaining budget.
+		# The bound takes O(n + m), so it is only checked every few levels.
+		if depth % BOUND_INTERVAL == 0 and lower_bound(g, w, k + 1) > k:
+			continue
 
-	if soln_left is not None:
-		return soln_redux.union(soln_left).union({x})
+		if memo is not None:
+			key = disjoint_key(g, w, k)
+			(hit, cached) = memo.lookup(key, g)
+			if hit:
+				if cached is None:
+					continue
+				soln = soln.union(cached)
+				break
 
-	soln_right = fvs_disjoint(g, w.union({x}), k)
+		if limit is not None and depth >= limit:
+			cuts += 1
+			continue
 
-	if soln_right is not None:
-		return soln_redux.union(soln_right)
+		x = branching_vertex(g, w)
+		choice = path[depth] if depth < len(path) else None
+		branch_mark = len(trail)
+		if memo is not None and depth >= len(path):
+			stack.append(('done', key, soln, cuts, branch_mark))
+		if choice is not True:
+			stack.append(('node', branch_mark, k, soln, depth + 1, x, False))
+		if choice is not False:
+			stack.append(('node', branch_mark, k, soln, depth + 1, x, True))
+	else:
+		soln = None
 
-	return None
+	# The open nodes left on the stack are the ancestors of the solution, the
+	# deepest last.
+	if soln is not None and memo is not None:
+		for entry in reversed(stack):
+			if entry[0] == 'done':
+				undo(trail, entry[4])
+				memo.store(entry[1], frozenset(soln.difference(entry[2])), edge_key(g))
+
+	undo(trail, root)
+	return (soln, cuts == 0)
+
+# Best-first version of disjoint_dfs. Each open node is a reduced copy of the
+# graph and of W, and the node with the largest gap between its budget and its
+# lower bound is expanded first (the one with fewer vertices left on ties).
+# The memo is only consulted, as subtrees are not finished in order.
+def disjoint_best_first(g: Graph, w: DisjointSet, k: int, path=(), memo=None, stats=None) -> set:
+	heap = []
+	counter = itertools.count()
+
+	# Reduce a new node and queue it. Returns its solution if it is solved.
+	def visit(g, w, k, soln, depth, dirty):
+		if stats is not None:
+			stats.count('nodes')
+			stats.reach(depth + 1)
+		(k, soln_redux) = apply_reductions(g, w, k, dirty, stats)
+		if k < 0:
+			return None
+		soln = soln.union(soln_redux)
+		if len(g) == 0:
+			return soln
+		bound = lower_bound(g, w, k + 1)
+		if bound > k:
+			return None
+		if memo is not None:
+			(hit, cached) = memo.lookup(disjoint_key(g, w, k), g)
+			if hit:
+				return None if cached is None else soln.union(cached)
+		heapq.heappush(heap, (bound - k, len(g), next(counter), g, w, k, soln, depth))
+		return None
+
+	soln = visit(g, w, k, set(), 0, g.vertices)
+	while soln is None and heap:
+		if cancelled():
+			return None
+		(_, _, _, g, w, k, node_soln, depth) = heapq.heappop(heap)
+		x = branching_vertex(g, w)
+		choice = path[depth] if depth < len(path) else None
+
+		if choice is not False:
+			gx = g if choice is True else g.copy()
+			dirty = [u for u in gx.adj[x] if u != x]
+			gx.remove_vertex(x)
+			soln = visit(gx, w if choice is True else w.copy(), k - 1, node_soln.union({x}), depth + 1, dirty)
+		if soln is None and choice is not True:
+			add_to_forest(g, w, x)
+			soln = visit(g, w, k, node_soln, depth + 1, forest_neighbourhood(g, w, x))
+	return soln
 
 # Given a graph G and an FVS Z of size (k + 1), construct an FVS of size at most k.
 # Return `None` if no such solution exists.
-def ic_compression(g: MultiGraph, z: set, k: int) -> MultiGraph:
+# With a SearchPool, the guesses are solved in parallel (see ic_compression_parallel).
+# Otherwise, `memo` and `stats` are passed on to the fvs_disjoint searches,
+# which use the traversal `search`. Each guess XZ is deleted from G itself (see
+# delete_guesses), and G is left unchanged.
+def ic_compression(g: Graph, z: set, k: int, pool=None, memo=None, stats=None, search='dfs') -> set:
 	assert (len(z) == k + 1)
+	if pool is not None:
+		return ic_compression_parallel(g, z, k, pool, search)
 	# i in {0 .. k}
-	for i in range(0, k + 1):
-		for xz in itertools.combinations(z, i):
-			x = fvs_disjoint(graph_minus(g, xz), z.difference(xz), k - i)
+	guesses = (xz for i in range(0, k + 1) for xz in itertools.combinations(sorted(z), i))
+	return solve_guesses(g, z, k, guesses, (), memo, stats, search)
+
+# Solve fvs_disjoint for each guess XZ ⊆ Z in turn, returning the first
+# solution found (with XZ added) or None.
+def solve_guesses(g: Graph, z: set, k: int, guesses, path=(), memo=None, stats=None, search='dfs') -> set:
+	outer_trail = g.trail
+	trail = g.trail = []
+	try:
+		for xz in delete_guesses(g, guesses):
+			if stats is not None:
+				stats.count('guesses')
+			x = fvs_disjoint(g, z.difference(xz), k - len(xz), path, memo, stats, search)
 			if x is not None:
 				return x.union(xz)
-	return None
+		return None
+	finally:
+		undo(trail, 0)
+		g.trail = outer_trail
+
+# Delete each guess (a tuple of vertices) from G in turn, yielding it while G is
+# G - XZ. Consecutive guesses from itertools.combinations share a prefix, like
+# neighbouring leaves of a trie, so only the vertices after the shared prefix
+# are restored (from G's trail) and deleted: O(Δ) per vertex changed, instead
+# of a copy of G per guess. The last guess is left deleted.
+def delete_guesses(g: Graph, guesses):
+	trail = g.trail
+	current = ()
+	# marks[j] is the trail length before current[j] was deleted.
+	marks = []
+	for xz in guesses:
+		p = 0
+		while p < len(current) and p < len(xz) and current[p] == xz[p]:
+			p += 1
+		if p < len(current):
+			undo(trail, marks[p])
+			del marks[p:]
+		for v in xz[p:]:
+			marks.append(len(trail))
+			g.remove_vertex(v)
+		current = xz
+		yield xz
+
+# A task of ic_compression_parallel: a batch of guesses XZ ⊆ Z, plus the choices
+# made at the top levels of their fvs_disjoint searches.
+def ic_compression_task(task) -> set:
+	(g, z, k, batch, path, search) = task
+	return solve_guesses(g, z, k, batch, path, search=search)
+
+# Parallel ic_compression, handing out about 8 tasks per worker. Most guesses
+# are cheap, so with many guesses each task is a batch of consecutive ones.
+# With few guesses, each is instead split into 2^d tasks by fixing the first d
+# branching decisions of fvs_disjoint. Tasks are handed out smallest guess
+# first, and all outstanding work is cancelled as soon as any task finds a
+# solution.
+def ic_compression_parallel(g: Graph, z: set, k: int, pool: SearchPool, search='dfs') -> set:
+	target = 8 * pool.workers
+	guesses = 2 ** len(z)
+	depth = max(0, math.ceil(math.log2(target / guesses)))
+	paths = list(itertools.product([True, False], repeat=depth))
+	batch_size = max(1, guesses // target)
+
+	def tasks():
+		batch = []
+		for i in range(0, k + 1):
+			for xz in itertools.combinations(sorted(z), i):
+				batch.append(xz)
+				if len(batch) == batch_size:
+					for path in paths:
+						yield (g, z, k, batch, path, search)
+					batch = []
+		if batch:
+			for path in paths:
+				yield (g, z, k, batch, path, search)
+
+	return pool.first(ic_compression_task, tasks())
+
+# A small FVS of G, though usually not a minimum one: vertices of degree <= 1
+# are deleted, vertices of degree 2 bypassed and vertices with a self-loop
+# taken, and when none of these apply a vertex of maximum degree is taken.
+def greedy_fvs(g: Graph) -> set:
+	g = g.copy()
+	soln = set()
+	queue = list(g.vertices)
+	while True:
+		while queue:
+			v = queue.pop()
+			if v not in g.vertices:
+				continue
+			if g.has_loop(v):
+				queue.extend(g.adj[v])
+				g.remove_vertex(v)
+				soln.add(v)
+			elif g.degree(v) <= 1:
+				queue.extend(g.adj[v])
+				g.remove_vertex(v)
+			elif g.degree(v) == 2:
+				queue.extend(g.contract(v))
+		if not g.vertices:
+			return soln
+		v = max(g.vertices, key=g.degree)
+		queue.extend(g.adj[v])
+		g.remove_vertex(v)
+		soln.add(v)
+
+# Vertex orders for iterative_compression. Each puts the vertices that are
+# unlikely to be in a small FVS first.
+
+# Degeneracy order: repeatedly take a vertex of minimum degree in what is left.
+def degeneracy_order(g: Graph) -> list:
+	degree = {v: g.degree(v) for v in g.vertices}
+	heap = [(d, v) for (v, d) in degree.items()]
+	heapq.heapify(heap)
+	order = []
+	while heap:
+		(d, v) = heapq.heappop(heap)
+		if v not in degree or d != degree[v]:
+			continue
+		del degree[v]
+		order.append(v)
+		for (u, c) in g.adj[v].items():
+			if u in degree:
+				degree[u] -= c
+				heapq.heappush(heap, (degree[u], u))
+	return order
+
+# Breadth-first order, starting each component at a vertex of minimum degree
+# and visiting neighbours in order of increasing degree.
+def bfs_order(g: Graph) -> list:
+	seen = set()
+	order = []
+	for s in sorted(g.vertices, key=g.degree):
+		if s in seen:
+			continue
+		seen.add(s)
+		i = len(order)
+		order.append(s)
+		while i < len(order):
+			v = order[i]
+			i += 1
+			for u in sorted(g.adj[v], key=g.degree):
+				if u not in seen:
+					seen.add(u)
+					order.append(u)
+	return order
+
+# Order by the number of short cycles through each vertex: the 2-cycles formed
+# by its parallel edges and the triangles through it, with ties broken by degree.
+def cycle_order(g: Graph) -> list:
+	def density(v):
+		av = g.adj[v]
+		cycles = 0
+		for (u, c) in av.items():
+			cycles += c - 1
+			if u != v:
+				cycles += sum(1 for x in g.adj[u] if x != v and x in av)
+		return (cycles, g.degree(v))
+	return sorted(g.vertices, key=density)
+
+WARM_STARTS = {'greedy': greedy_fvs}
+VERTEX_ORDERS = {'degeneracy': degeneracy_order, 'bfs': bfs_order, 'cycles': cycle_order}
+
+# The warm start `start` names (one of WARM_STARTS, or of the approximations
+# '2approx' and 'local', which are added to it from approx.py when first named,
+# as approx.py imports this module), or `start` itself if it is a function.
+def warm_start(start):
+	if callable(start):
+		return start
+	if start not in WARM_STARTS:
+		from approx import two_approx_fvs, local_search_fvs
+		WARM_STARTS.setdefault('2approx', two_approx_fvs)
+		WARM_STARTS.setdefault('local', local_search_fvs)
+	if start not in WARM_STARTS:
+		raise ValueError("Unknown warm start {!r}".format(start))
+	return WARM_STARTS[start]
 
 # Given a graph G and an integer k, construct an FVS of size at most k using
 # the iterative compression based algorithm from Parametrzed Algorithms 4.3.1
-def fvs_via_ic(g: MultiGraph, k: int) -> set:
-	if len(g) <= k + 2:
-		return set(g.nodes()[:k])
+# The instance is first kernelized (unless `kernel` is False), and then split
+# into independent pieces (unless `decompose` is False, see decomposed_ic).
+# With workers > 1, the pieces, or else the compression steps, run on a pool of
+# that many processes.
+# `start` and `order` pick a warm start and a vertex order for the compression
+# (see iterative_compression), and `search` the traversal of the fvs_disjoint
+# searches (see DISJOINT_SEARCHES). A SearchCache given as `memo` caches the states
+# of the fvs_disjoint searches (unless workers > 1), and can be shared between
+# calls. A SearchStats given as `stats` collects statistics on the search (see
+# stats.py); with workers > 1, only those of decomposed pieces are collected.
+# A Budget makes the call anytime (see anytime_start and settle).
+def fvs_via_ic(g, k: int, workers=1, kernel=True, decompose=True, start=None, order=None, stats=None, memo=None, search='dfs', budget=None) -> set:
+	(g, labels) = from_networkx(g)
+	forced = set()
+	if kernel:
+		with phase(stats, 'kernel'):
+			(g, k, forced) = kernelize(g, k)
+		if k < 0:
+			return settle(budget, None)
+	return ic_kernel(g, k, forced, labels, workers, decompose, start, order, stats, memo, search, budget)
+
+# The rest of fvs_via_ic, given the kernel (G, k) with its `forced` vertices and
+# the `labels` of the input, which the answer and the reported FVSs are mapped
+# back to.
+def ic_kernel(g: Graph, k: int, forced: set, labels, workers=1, decompose=True, start=None, order=None, stats=None, memo=None, search='dfs', budget=None) -> set:
+	with phase(stats, 'bound'):
+		if lower_bound(g, (), k + 1) > k:
+			return settle(budget, None)
+	lifted = lambda soln: relabel(lift(soln, forced), labels)
+	if anytime_start(g, k, start, budget, lifted):
+		return settle(budget, budget.best)
+	report = None if budget is None else lambda soln: budget.improve(lifted(soln))
+
+	if workers > 1:
+		memo = None
+	options = (start, order, memo, search)
+
+	pool = SearchPool(workers) if workers > 1 else None
+	try:
+		with phase(stats, 'search'), budget.running() if budget else nullcontext():
+			if decompose:
+				soln = decomposed_ic(g, k, pool, options, stats, report)
+			else:
+				soln = iterative_compression(g, k, pool, options, stats, report)
+	finally:
+		if pool is not None:
+			pool.close()
+
+	return settle(budget, relabel(lift(soln, forced), labels))
+
+# Anytime solving. Given a Budget, fvs_via_ic and fvs_via_mif first report the
+# FVS of a warm start (greedy_fvs by default) as their first solution, and
+# answer with it if it is small enough. Otherwise the search runs until it
+# answers or the budget runs out, and in the latter case the call returns the
+# best FVS reported so far, which is larger than k, with budget.proven False.
+# fvs_via_ic also reports the smaller FVSs its compression rounds lead to (see
+# iterative_compression), and fvs_via_mif, with one worker, the FVSs left by
+# the larger forests its optimisation search finds (see mif_fvs).
+
+# Report the warm start FVS of the kernel G (as mapped back to the input by
+# `lift`) to the budget. Returns True if it answers the instance.
+def anytime_start(g: Graph, k: int, start, budget, lift) -> bool:
+	if budget is None:
+		return False
+	approx = warm_start(start)(g) if start is not None else greedy_fvs(g)
+	budget.improve(lift(approx))
+	return len(approx) <= k
+
+# The answer of a solver call, recorded with its budget, if any. A solution, or
+# a None reached before the budget ran out, is final. A None after it ran out
+# only means the search gave up, and the best FVS so far is returned instead.
+def settle(budget, soln) -> set:
+	if budget is None:
+		return soln
+	if soln is None and budget.expired():
+		return budget.best
+	budget.improve(soln)
+	budget.proven = True
+	return soln
+
+# Run a solver with a Budget of `seconds` (or until `budget`, if given, runs
+# out or is cancelled), reporting each better FVS it finds to `on_improve`.
+# Returns (fvs, proven): the answer or the best FVS found, and whether the
+# answer is final.
+def anytime(alg, g, k: int, seconds=None, on_improve=None, budget=None, **options) -> (set, bool):
+	if budget is None:
+		budget = Budget(seconds, on_improve)
+	fvs = alg(g, k, budget=budget, **options)
+	return (fvs, budget.proven)
+
+# Add the vertices of G one at a time, keeping an FVS of the graph induced by
+# the vertices so far. A vertex only joins the FVS if it closes a cycle with the
+# rest of the graph so far, and a compression round is only needed once the FVS
+# reaches size k + 1.
+# options = (start, order, memo, search), where memo and search are passed on
+# to ic_compression. `order` names one of VERTEX_ORDERS (or is a function
+# from G to a list of its vertices), and None adds vertices by number. `start`
+# is a warm start (see warm_start): if the FVS it finds has size at most k it
+# is the answer, and otherwise its vertices are added last, so G stays a forest
+# until they come in and at most one round is needed when it has size k + 1.
+# `report`, if given, is called with an FVS of G after each round: the FVS of
+# the graph so far together with the warm start vertices still to come, which
+# hit every other cycle. A warm start (greedy_fvs by default) is then always
+# taken.
+def iterative_compression(g: Graph, k: int, pool, options=(None, None, None, 'dfs'), stats=None, report=None) -> set:
+	(start, order, memo, search) = options
+	if order is None:
+		nodes = sorted(g.vertices)
+	else:
+		nodes = VERTEX_ORDERS.get(order, order)(g)
 
-	# Construct a trivial FVS of size k + 1 on the first k + 3 vertices of G.
-	nodes = g.nodes()
+	if len(nodes) <= k:
+		return set(nodes)
 
-	# The set of nodes currently under consideration.
-	node_set = set(nodes[:(k + 2)])
+	if start is not None or report is not None:
+		approx = warm_start(start)(g) if start is not None else greedy_fvs(g)
+		if len(approx) <= k:
+			return set(approx)
+		nodes = [v for v in nodes if v not in approx] + [v for v in nodes if v in approx]
+
+	# The subgraph induced by the nodes currently under consideration, grown
+	# one vertex at a time.
+	h = g.subgraph(())
 
 	# The current best solution, of size (k + 1) before each compression step,
-	# and size <= k at the end.
-	soln = set(nodes[:k])
+	# and size <= k at the end, and the components of the forest it leaves.
+	soln = set()
+	forest = DisjointSet()
 
-	for i in range(k + 2, len(nodes)):
-		soln.add(nodes[i])
-		node_set.add(nodes[i])
+	for v in nodes:
+		h.add_from(g, v)
+		if add_to_forest(h, forest, v):
+			continue
+		soln.add(v)
 
 		if len(soln) < k + 1:
 			continue
 
-		assert (len(soln) == (k + 1))
-		assert (len(node_set) == (i + 1))
-
-		new_soln = ic_compression(g.subgraph(node_set), soln, k)
+		if stats is not None:
+			stats.count('rounds')
+		soln = ic_compression(h, soln, k, pool, memo, stats, search)
 
-		if new_soln is None:
+		if soln is None:
 			return None
 
-		soln = new_soln
 		assert (len(soln) <= k)
+		forest = induced_forest(h, h.vertices.difference(soln))
+		if report is not None:
+			report(soln.union(approx.difference(h.vertices)))
 
 	return soln
 
-def compress(g: MultiGraph, t: set, compressed_node, mutate=False) -> MultiGraph:
-	if not t:
-		return g
-	if mutate:
-		gx = g
+# The smallest FVS of G of size at most `limit`, by trying each budget in turn.
+def min_fvs_ic(g: Graph, limit: int, options=(None, None, None, 'dfs'), stats=None) -> set:
+	for b in range(lower_bound(g, (), limit + 1), limit + 1):
+		soln = iterative_compression(g, b, None, options, stats)
+		if soln is not None:
+			return soln
+	return None
+
+# A task of decomposed_ic. For a leaf block B (a block with a single cut vertex
+# c) it returns (S1, S): a minimum FVS S1 of B - c of size at most `limit`, and
+# an FVS S of B of the same size if there is one (None otherwise). Without a cut
+# vertex, it returns a minimum FVS of the whole piece instead. Either result
+# comes with the SearchStats of the task if `collect` is set, and None otherwise.
+def block_task(task):
+	(b, c, limit, options, collect) = task
+	stats = SearchStats() if collect else None
+	if c is None:
+		return (min_fvs_ic(b, limit, options, stats), stats)
+	s1 = min_fvs_ic(graph_minus(b, {c}), limit, options, stats)
+	if s1 is None:
+		return ((None, None), stats)
+	return ((s1, iterative_compression(b, len(s1), None, options, stats)), stats)
+
+# Solve the tasks of decomposed_ic, reusing the results for pieces with the
+# same canonical form (see graph.canonical_form).
+def solve_blocks(tasks: list, pool, cache: dict, options, stats) -> list:
+	forms = [canonical_form(b, b.vertices, c) for (b, c, _) in tasks]
+	todo = [i for (i, (key, _)) in enumerate(forms) if key not in cache]
+	todo_tasks = [tasks[i] + (options, stats is not None) for i in todo]
+	if pool is not None:
+		results = pool.map(block_task, todo_tasks)
 	else:
-		gx = g.copy()
+		results = [block_task(task) for task in todo_tasks]
+	if stats is not None:
+		for (_, task_stats) in results:
+			stats.merge(task_stats)
+	results = [result for (result, _) in results]
 
-	tx = t
-	if compressed_node in tx:
-		tx = t.copy()
-		tx.remove(compressed_node)
-	gx.add_node(compressed_node)
+	# Store and look up results in canonical numbering.
+	to_canon = lambda soln, position: None if soln is None else frozenset(position[v] for v in soln)
+	from_canon = lambda soln, order: None if soln is None else {order[i] for i in soln}
+	for (i, result) in zip(todo, results):
+		(key, order) = forms[i]
+		position = {v: j for (j, v) in enumerate(order)}
+		if tasks[i][1] is None:
+			cache[key] = to_canon(result, position)
+		else:
+			cache[key] = tuple(to_canon(soln, position) for soln in result)
 
-	for node in tx:
-		for edge in gx.edges(node):
-			if edge[0] == node:
-				node_2 = edge[1]
-			else:
-				node_2 = edge[0]
-			if not (node_2 in t or node_2 == compressed_node):
-				gx.add_edge(compressed_node, node_2)
-		gx.remove_node(node)
+	solutions = []
+	for (i, (key, order)) in enumerate(forms):
+		if tasks[i][1] is None:
+			solutions.append(from_canon(cache[key], order))
+		else:
+			solutions.append(tuple(from_canon(soln, order) for soln in cache[key]))
+	return solutions
 
-	remove = set()
-	for node in gx.adj[compressed_node]:
-		if len(gx.adj[compressed_node][node]) >= 2:
-			# Using a set to remove to avoid messing up iteration of adj
-			remove.add(node)
+# Decompose G into pieces that can be solved independently, and combine their
+# solutions into an FVS of size at most k.
+# FVS is additive over connected components. It is not additive over blocks,
+# since a cut vertex can hit cycles in several blocks, so blocks are instead
+# peeled off one leaf block B at a time, with c its cut vertex. Let b be the
+# minimum FVS size of B - c. If B has an FVS of size b, then it avoids c, and
+# B contributes b vertices however c is treated, so B - c can be removed.
+# Otherwise, c can be taken together with an FVS of B - c, and B removed.
+# Every component except the largest is solved exactly; the largest only needs
+# an FVS within the remaining budget. Independent pieces run concurrently on the
+# pool, if given. Any FVS of the last piece, together with the solutions taken
+# before it, is an FVS of G, so `report` is passed on to its iterative
+# compression as such.
+def decomposed_ic(g: Graph, k: int, pool, options, stats, report=None) -> set:
+	g = g.copy()
+	soln = set()
+	cache = {}
 
-	for node in remove:
-		gx.remove_node(node)
+	# Vertices with self-loops are in every FVS.
+	loops = [v for v in g.vertices if g.has_loop(v)]
+	g.remove_vertices(loops)
+	soln.update(loops)
+	k -= len(loops)
+	if k < 0:
+		return None
 
-	return gx
+	components = sorted(connected_components(g), key=len)
+	if not components:
+		return soln
+	tasks = [(g.subgraph(c), None, k) for c in components[:-1]]
+	for s in solve_blocks(tasks, pool, cache, options, stats):
+		if s is None:
+			return None
+		soln.update(s)
+		k -= len(s)
+		if k < 0:
+			return None
+
+	g = g.subgraph(components[-1])
+	while True:
+		# Trees hanging off the blocks do not matter.
+		reduce = [v for v in g.vertices if g.degree(v) <= 1]
+		while reduce:
+			v = reduce.pop()
+			if v in g.vertices and g.degree(v) <= 1:
+				reduce.extend(g.adj[v])
+				g.remove_vertex(v)
+
+		blocks = biconnected_components(g)
+		if len(blocks) <= 1:
+			if report is not None:
+				report_rest = lambda rest: report(soln.union(rest))
+			else:
+				report_rest = None
+			rest = iterative_compression(g, k, pool, options, stats, report_rest)
+			if rest is None:
+				return None
+			return soln.union(rest)
 
-def generalized_degree(g: MultiGraph, f: set, active_node, node) -> (int, set):
-	assert g.has_node(node), "Calculating gd for node which is not in g!"
+		# Take one leaf block per cut vertex, so that they are independent.
+		# Removing cut vertices can also leave blocks that are components of
+		# their own, which are solved exactly.
+		count = {}
+		for block in blocks:
+			for v in block:
+				count[v] = count.get(v, 0) + 1
+		leaves = {}
+		tasks = []
+		for block in blocks:
+			cuts = [v for v in block if count[v] >= 2]
+			if not cuts:
+				tasks.append((g.subgraph(block), None, k))
+			elif len(cuts) == 1 and cuts[0] not in leaves:
+				leaves[cuts[0]] = block
+		tasks.extend((g.subgraph(block), c, k) for (c, block) in leaves.items())
 
-	k = set(g.neighbors(node))
-	k.remove(active_node)
-	k = k.intersection(f)
+		for ((b, c, _), result) in zip(tasks, solve_blocks(tasks, pool, cache, options, stats)):
+			if c is None:
+				if result is None:
+					return None
+				soln.update(result)
+				g.remove_vertices(b.vertices)
+				k -= len(result)
+				if k < 0:
+					return None
+				continue
+
+			(s1, s) = result
+			if s1 is None:
+				return None
+			if s is not None:
+				soln.update(s)
+				g.remove_vertices(b.vertices.difference({c}))
+				k -= len(s)
+			else:
+				soln.update(s1)
+				soln.add(c)
+				g.remove_vertices(b.vertices)
+				k -= len(s1) + 1
+			if k < 0:
+				return None
+
+# Merge the vertices of T into `compressed_node`, then delete every vertex joined
+# to the merged vertex by two or more edges (see Graph.contract_set).
+def compress(g: Graph, t: set, compressed_node, mutate=False) -> Graph:
+	if not t:
+		return g
+	if mutate:
+		gx = g
+	else:
+		gx = g.copy()
+	gx.contract_set(compressed_node, t)
+	return gx
 
-	gx = compress(g, k, node)
+# The neighbours other than `active_node` that `node` would have after merging
+# its neighbours in F into it, i.e. in compress(g, N(node) ∩ F, node). They are
+# read off the adjacency of the merged vertices, without building the merged
+# graph: vertices reached by two or more edges would be deleted by compress.
+# Costs O(sum of degrees of the merged vertices).
+def generalized_degree(g: Graph, f: set, active_node, node) -> (int, set):
+	assert node in g, "Calculating gd for node which is not in g!"
 
-	neighbors = gx.neighbors(node)
+	merged = {u for u in g.adj[node] if u in f and u != active_node}
+	if not merged:
+		neighbors = set(g.adj[node])
+	else:
+		merged.add(node)
+		count = {}
+		for v in merged:
+			for (x, c) in g.adj[v].items():
+				if x not in merged:
+					count[x] = count.get(x, 0) + c
+		neighbors = {x for (x, c) in count.items() if c == 1}
 	neighbors.remove(active_node)
 
 	return (len(neighbors), neighbors)
 
-def mif_main(g: MultiGraph, f: set, t, k: int) -> set:
+# The mif recursion runs on an explicit stack (see mif_search). Each of
+# mif_branch, mif_main, mif_preprocess_1 and mif_preprocess_2 is a generator
+# that yields the searches of its subproblems one at a time and is sent their
+# results back, and returns its own result. A subproblem is only built when
+# its search starts, and references to graphs that are no longer needed are
+# dropped before yielding, so each graph is freed as soon as the branches
+# using it are finished.
+
+# Run a search made of the generators above, on an explicit stack of the
+# suspended calls. With a depth `limit`, calls nested deeper are not run and
+# count as failed (None). Returns (result, complete), where complete is False
+# if calls were cut off at the limit.
+def mif_search(search, limit=None) -> (set, bool):
+	stack = [search]
+	result = None
+	cuts = 0
+	while stack:
+		# Give up if a parallel search has already been answered elsewhere.
+		if cancelled():
+			for call in stack:
+				call.close()
+			return (None, True)
+		try:
+			call = stack[-1].send(result)
+		except StopIteration as done:
+			stack.pop()
+			result = done.value
+			continue
+		result = None
+		if limit is not None and len(stack) >= limit:
+			call.close()
+			cuts += 1
+		else:
+			stack.append(call)
+	return (result, cuts == 0)
+
+# The traversals of the mif search tree: depth-first, or iterative deepening
+# with a doubling limit on the nesting of calls. Iterative deepening only
+# applies to the decision version (k given).
+MIF_SEARCHES = ['dfs', 'iddfs']
+
+# Evaluate the two branches of mif_main, given as the arguments
+# (G, F, t, k, added) of their mif_preprocess_1 calls (None for a branch known
+# to fail), and return
+# the larger forest. If `path` is non-empty, its first entry restricts the
+# search to the first (True) or second (False) branch.
+def mif_branch(branch1, branch2, bb, path, memo, stats) -> set:
+	choice = path[0] if path else None
+	path = path[1:]
+	mif_set1 = mif_set2 = None
+	if choice is not False and branch1 is not None:
+		call = mif_preprocess_1(*branch1[:4], bb, path, memo, stats, branch1[4])
+		branch1 = None
+		mif_set1 = yield call
+	branch1 = None
+	if choice is not True and branch2 is not None:
+		call = mif_preprocess_1(*branch2[:4], bb, path, memo, stats, branch2[4])
+		branch2 = None
+		mif_set2 = yield call
+	if not mif_set1:
+		return mif_set2
+	elif not mif_set2:
+		return mif_set1
+	else:
+		return max(mif_set1, mif_set2, key=len)
+
+# In the optimisation mode (k = None), `bb` holds the branch-and-bound state
+# (incumbent, base, slack, outer): the size of the largest forest found so far,
+# the number of forest vertices already fixed outside G, an upper bound on what
+# the not yet solved sibling components of G can add, and those fixed vertices
+# themselves, as a chain of (set, outer) pairs. A subproblem that cannot beat
+# the incumbent even if all of G joins the forest returns None, and so does
+# every subproblem once the incumbent has reached its goal.
+def mif_main(g: Graph, f: set, t, k: int, bb=None, path=(), memo=None, stats=None) -> set:
 	k_set = k != None
 	new_k1 = new_k2 = None
+	if stats is not None:
+		stats.count('nodes')
 	if k_set and k > g.order():
 		return None
-	if f == g.nodes() or (k_set and k <= 0):
+	if bb is not None:
+		(incumbent, base, slack, _) = bb
+		if base + slack + g.order() <= incumbent.get() or incumbent.reached():
+			return None
+	if f == g.vertices or (k_set and k <= 0):
 		return f
+	# The forest loses the vertices of an FVS of G avoiding F. `room` is the
+	# most vertices it can lose and still be large enough.
+	# The bound takes O(n + m), like the copy made to branch, so it is only
+	# checked at nodes that branch.
+	room = None
+	if k_set:
+		room = g.order() - len(f) - k
+	elif bb is not None:
+		room = base + slack + g.order() - incumbent.get() - 1
 	if (not f):
-		g_degree = g.degree()
-		g_max_degree_node = max(g_degree, key=lambda n: g_degree[n])
-		if (g_degree[g_max_degree_node] <= 1):
-			return set(g.nodes())
+		g_max_degree_node = max(g.vertices, key=g.degree)
+		if (g.degree(g_max_degree_node) <= 1):
+			return set(g.vertices)
 		else:
+			if room is not None and lower_bound(g, f, room + 1) > room:
+				return None
 			fx = f.copy()
 			fx.add(g_max_degree_node)
 			gx = g.copy()
-			gx.remove_node(g_max_degree_node)
+			gx.remove_vertex(g_max_degree_node)
 			if k_set:
 				new_k1 = k-1
 				new_k2 = k
-			mif_set1 = mif_preprocess_1(g, fx, t, new_k1)
-			mif_set2 = mif_preprocess_1(gx, f, t, new_k2)
-			if not mif_set1:
-				return mif_set2
-			elif not mif_set2:
-				return mif_set1
-			else:
-				return max(mif_set1, mif_set2, key=len)
+			if stats is not None:
+				stats.count('branch_max_degree')
+			call = mif_branch((g, fx, t, new_k1, {g_max_degree_node}), (gx, f, t, new_k2, ()), bb, path, memo, stats)
+			del g, gx
+			return (yield call)
 
 	# Set t as active vertex
 	if t == None or not t in f:
@@ -277,34 +998,37 @@ def mif_main(g: MultiGraph, f: set, t, k: int) -> set:
 
 	gd_over_3 = None
 	gd_2 = None
-	for v in g.neighbors_iter(t):
+	for v in g.neighbours(t):
 		(gd_v, gn_v) = generalized_degree(g, f, t, v)
 		if gd_v <= 1:
+			if stats is not None:
+				stats.count('gd1')
 			f.add(v)
 			if k_set:
 				new_k1 = k-1
-			return mif_preprocess_1(g, f, t, new_k1)
+			call = mif_preprocess_1(g, f, t, new_k1, bb, path, memo, stats, {v})
+			del g
+			return (yield call)
 		elif gd_v >= 3:
 			gd_over_3 = v
 		else:
 			gd_2 = (v, gn_v)
+	if room is not None and lower_bound(g, f, room + 1) > room:
+		return None
 	if gd_over_3 != None:
 		# Cannot simply use "if gd_over_3" because v might be 0
 		fx = f.copy()
 		fx.add(gd_over_3)
 		gx = g.copy()
-		gx.remove_node(gd_over_3)
+		gx.remove_vertex(gd_over_3)
 		if k_set:
 			new_k1 = k-1
 			new_k2 = k
-		mif_set1 = mif_preprocess_1(g, fx, t, new_k1)
-		mif_set2 = mif_preprocess_1(gx, f, t, new_k2)
-		if not mif_set1:
-			return mif_set2
-		elif not mif_set2:
-			return mif_set1
-		else:
-			return max(mif_set1, mif_set2, key=len)
+		if stats is not None:
+			stats.count('branch_gd3')
+		call = mif_branch((g, fx, t, new_k1, {gd_over_3}), (gx, f, t, new_k2, ()), bb, path, memo, stats)
+		del g, gx
+		return (yield call)
 	elif gd_2 != None:
 		(v, gn) = gd_2
 		fx1 = f.copy()
@@ -313,56 +1037,128 @@ def mif_main(g: MultiGraph, f: set, t, k: int) -> set:
 		for n in gn:
 			fx2.add(n)
 		gx = g.copy()
-		gx.remove_node(v)
+		gx.remove_vertex(v)
 		if k_set:
 			new_k1 = k-2
 			new_k2 = k-1
-		try:
-			cyc.find_cycle(gx.subgraph(fx2))
-			mif_set1 = None
-		except:
-			mif_set1 = mif_preprocess_1(gx, fx2, t, new_k1)
-		mif_set2 = mif_preprocess_1(g, fx1, t, new_k2)
-		if not mif_set1:
-			return mif_set2
-		elif not mif_set2:
-			return mif_set1
-		else:
-			return max(mif_set1, mif_set2, key=len)
+		if stats is not None:
+			stats.count('branch_gd2')
+		branch1 = (gx, fx2, t, new_k1, gn) if is_forest(gx, fx2) else None
+		call = mif_branch(branch1, (g, fx1, t, new_k2, {v}), bb, path, memo, stats)
+		del g, gx, branch1
+		return (yield call)
 	return None
 
-def mif_preprocess_2(g: MultiGraph, f: set, active_v, k: int) -> set:
+# The union of a set and the sets of a chain of (set, outer) pairs.
+def chain_union(outer, s: set) -> set:
+	s = set(s)
+	while outer is not None:
+		(fixed, outer) = outer
+		s.update(fixed)
+	return s
+
+# The components of G[F] with more than one vertex, given that F was an
+# independent set before the vertices `added` joined it (None if nothing is
+# known about F). Every edge of G[F] then touches an added vertex, so only the
+# components of the added vertices need to be searched, which takes
+# O(sum of the degrees of their vertices).
+def f_components(g: Graph, f: set, added=None) -> list:
+	return [c for c in connected_components(g, f, added) if len(c) > 1]
+
+# Contract every component of G[F] into a single vertex (see compress), which
+# is the active vertex for its component, leaving F independent, and solve the
+# rest with mif_main. The components are disjoint and only joined through vertices
+# outside F, so they are all contracted in one pass.
+def mif_preprocess_2(g: Graph, f: set, active_v, k: int, bb=None, path=(), memo=None, stats=None, added=None) -> set:
 	mif_set = set()
-	while not is_independent_set(g, f):
-		mif_set = mif_set.union(f)
-		for component in nxc.connected_components(g.subgraph(f)):
-			if len(component) > 1:
-				if active_v in component:
-					active_v = component.pop()
-					compressed_node = active_v
-				else:
-					compressed_node = component.pop()
-				g = compress(g, component, compressed_node, True)
-				f = f.intersection(g.nodes())
-				# Maybe faster with
-				# f = f.difference(component)
-				# f.add(compressed_node)
-				mif_set = mif_set.union(component)
-				break
-	mif_set2 = mif_main(g, f, active_v, k)
+	components = f_components(g, f, added)
+	if components:
+		mif_set = set(f)
+		merged = set()
+		for component in components:
+			if active_v in component:
+				component.remove(active_v)
+				compressed_node = active_v
+			else:
+				compressed_node = component.pop()
+			g = compress(g, component, compressed_node, True)
+			merged.update(component)
+		f = f.difference(merged)
+	inner_bb = bb
+	if bb is not None:
+		# The merged vertices are in the forest, but no longer in G.
+		(incumbent, base, slack, outer) = bb
+		merged = mif_set.difference(g.vertices)
+		inner_bb = (incumbent, base + len(merged), slack, (merged, outer))
+	# Without branch-and-bound, the result only depends on the arguments, so
+	# it can be cached.
+	key = None
+	hit = False
+	if memo is not None and bb is None:
+		key = ('mif', k, active_v, frozenset(f), frozenset(g.vertices), g.edge_hash)
+		(hit, mif_set2) = memo.lookup(key, g)
+	if hit:
+		mif_set2 = None if mif_set2 is None else set(mif_set2)
+	else:
+		# The search changes G, so the edges to store are read off first.
+		edges = edge_key(g) if key is not None and not path else None
+		if stats is not None:
+			stats.enter()
+		call = mif_main(g, f, active_v, k, inner_bb, path, memo, stats)
+		del g
+		# mif_search closes the suspended calls when it gives up.
+		try:
+			mif_set2 = yield call
+		finally:
+			if stats is not None:
+				stats.leave()
+		if edges is not None and not cancelled():
+			memo.store(key, None if mif_set2 is None else frozenset(mif_set2), edges)
+	if bb is not None:
+		if mif_set2 is None:
+			return None
+		mif_set = mif_set2.union(mif_set)
+		if slack == 0:
+			incumbent.offer(base + len(mif_set), lambda: chain_union(outer, mif_set))
+		return mif_set
 	if mif_set2:
 		mif_set = mif_set2.union(mif_set)
 	if k == None or len(mif_set) >= k:
 		return mif_set
 	return None
 
-def mif_preprocess_1(g: MultiGraph, f: set, active_v, k: int) -> set:
-	if nxc.number_connected_components(g) >= 2:
+# Split G into its connected components and solve them one at a time, or pass
+# G on to mif_preprocess_2 if it is connected. `added` lists the vertices that
+# joined F since F was last independent (see f_components).
+def mif_preprocess_1(g: Graph, f: set, active_v, k: int, bb=None, path=(), memo=None, stats=None, added=None) -> set:
+	components = connected_components(g)
+	if len(components) >= 2:
 		mif_set = set()
-		for component in nxc.connected_components(g):
-			f_i = component.intersection(f)
-			gx = g.subgraph(component)
-			component_mif_set = mif_preprocess_2(gx, f_i, active_v, None)
+		if bb is not None:
+			(incumbent, base, slack, outer) = bb
+			# Until solved, each component could at best join the forest entirely.
+			slack += len(g)
+		# Split G up front, so that each piece is freed once it is solved.
+		pieces = [(component.intersection(f), g.subgraph(component)) for component in components]
+		del g
+		# The rest of the path goes on into the largest component, so that the
+		# tasks of the parallel mif split its search between them, and the
+		# other components are solved whole, so that each combination of
+		# per-component optima is reachable.
+		largest = max(range(len(pieces)), key=lambda i: pieces[i][1].order()) if path else None
+		for i in range(len(pieces)):
+			(f_i, gx) = pieces[i]
+			added_i = None if added is None else f_i.intersection(added)
+			pieces[i] = None
+			component_bb = None
+			if bb is not None:
+				slack -= len(gx)
+				component_bb = (incumbent, base + len(mif_set), slack, (mif_set, outer))
+			call = mif_preprocess_2(gx, f_i, active_v, None, component_bb, path if i == largest else (), memo, stats, added_i)
+			del gx
+			component_mif_set = yield call
+			if bb is not None and component_mif_set is None:
+				return None
 			if component_mif_set:
 				mif_set = mif_set.union(component_mif_set)
 				if k != None:
@@ -372,18 +1168,128 @@ def mif_preprocess_1(g: MultiGraph, f: set, active_v, k: int) -> set:
 		if k == None or len(mif_set) >= k:
 			return mif_set
 		return None
-	return mif_preprocess_2(g, f, active_v, k)
+	call = mif_preprocess_2(g, f, active_v, k, bb, path, memo, stats, added)
+	del g
+	return (yield call)
 
-def mif(g: MultiGraph, k=None) -> set:
-	mif_set = mif_preprocess_1(g, set(), None, k)
-	if k != None and mif_set:
-		if len(mif_set) < k:
-			mif_set = None
+# A task of the parallel mif: the search with its top branching decisions fixed.
+def mif_task(task) -> set:
+	(g, k, path, memo, stats, search) = task
+	if k is None:
+		(mif_set, _) = mif_search(mif_preprocess_1(g, set(), None, None, (Incumbent(), 0, 0, None), path, memo, stats))
+		return mif_set
+	if search == 'dfs':
+		(mif_set, _) = mif_search(mif_preprocess_1(g, set(), None, k, None, path, memo, stats))
+	elif search == 'iddfs':
+		# Deepen until a forest is found or no call was cut off. The search
+		# changes its graph, so each pass gets a copy, and results of truncated
+		# searches are not cached.
+		limit = 16
+		while True:
+			(mif_set, complete) = mif_search(mif_preprocess_1(g.copy(), set(), None, k, None, path, None, stats), limit)
+			if (mif_set and len(mif_set) >= k) or complete:
+				break
+			limit *= 2
+	else:
+		raise ValueError("Unknown search {}".format(search))
+	if mif_set and len(mif_set) < k:
+		return None
 	return mif_set
 
-def fvs_via_mif(g: MultiGraph, k: int) -> set:
-	mif_set = mif(g, g.order()-k)
-	if mif_set:
-		nodes = set(g.nodes())
-		mif_set = nodes.difference(mif_set)
-	return mif_set
+# Find a maximum induced forest of G, or one of size at least k if k is given.
+# Without k, branches that cannot beat the largest forest found so far are
+# pruned. With workers > 1, the top branching levels are split across a pool of
+# that many processes, which share their best forest size. Otherwise, a
+# SearchCache given as `memo` caches the subproblems solved without
+# branch-and-bound (with k given, or inside a component), and a SearchStats
+# given as `stats` collects statistics on the search (see stats.py). With k
+# given, `search` picks the traversal (see MIF_SEARCHES).
+def mif(g, k=None, workers=1, memo=None, stats=None, search='dfs') -> set:
+	(g, labels) = from_networkx(g)
+	if not g.is_simple():
+		raise ValueError("mif needs a graph without self-loops or parallel edges")
+	if workers > 1:
+		depth = math.ceil(math.log2(4 * workers))
+		tasks = [(g, k, path, None, None, search) for path in itertools.product([True, False], repeat=depth)]
+		with SearchPool(workers) as pool:
+			if k is None:
+				results = [r for r in pool.map(mif_task, tasks) if r is not None]
+				mif_set = max(results, key=len) if results else None
+			else:
+				mif_set = pool.first(mif_task, tasks)
+	else:
+		mif_set = mif_task((g, k, (), memo, stats, search))
+	return relabel(mif_set, labels)
+
+# An FVS of G of size at most k found with mif, or None. mif needs a simple
+# graph, so the self-loops and double edges of G are dealt with first: a vertex
+# with a self-loop is in every FVS, and a double edge needs one of its ends,
+# which is branched on (on an explicit stack, at most k deep). With `report`,
+# each simple subproblem is solved serially in the optimisation mode instead,
+# and report is called with each FVS smaller than the best so far (of size
+# `best`) left by the forests found on the way. The incumbent of each search
+# starts from the best FVS so far, so that only such forests are searched for,
+# and stops once a forest is large enough.
+def mif_fvs(g: Graph, k: int, workers=1, memo=None, stats=None, search='dfs', report=None, best=None) -> set:
+	stack = [(g, k, set())]
+	while stack:
+		(g, k, taken) = stack.pop()
+		loops = {v for v in g.vertices if g.has_loop(v)}
+		if loops:
+			(g, k, taken) = (graph_minus(g, loops), k - len(loops), taken.union(loops))
+		if k < 0:
+			continue
+		pair = next(((u, v) for u in g.vertices for (v, c) in g.adj[u].items() if c >= 2), None)
+		if pair is None and report is None:
+			mif_set = mif(g, g.order() - k, workers, memo, stats, search)
+			if mif_set is not None:
+				return taken.union(g.vertices.difference(mif_set))
+			continue
+		if pair is None:
+			# The search changes its graph, so its vertices are kept aside.
+			vertices = set(g.vertices)
+			if len(vertices) <= k:
+				return taken.union(vertices)
+			found = []
+
+			def offer(forest):
+				nonlocal best
+				soln = taken.union(vertices.difference(forest))
+				found.append(soln)
+				best = len(soln)
+				report(soln)
+
+			incumbent = Incumbent(max(0, len(taken) + len(vertices) - best), len(vertices) - k, offer)
+			mif_search(mif_preprocess_1(g, set(), None, None, (incumbent, 0, 0, None), (), None, stats))
+			if found and len(found[-1]) - len(taken) <= k:
+				return found[-1]
+			continue
+		for x in reversed(pair):
+			stack.append((graph_minus(g, {x}), k - 1, taken.union({x})))
+	return None
+
+# The instance is first kernelized (unless `kernel` is False), and the double
+# edges of the kernel are branched on before mif runs (see mif_fvs).
+# `memo`, `stats` and `search` are passed on to mif, and a Budget makes the
+# call anytime (see anytime_start and settle). With a Budget and one worker,
+# the search runs in the optimisation mode, without memo or search.
+def fvs_via_mif(g, k: int, workers=1, kernel=True, memo=None, stats=None, search='dfs', budget=None) -> set:
+	(g, labels) = from_networkx(g)
+	forced = set()
+	if kernel:
+		with phase(stats, 'kernel'):
+			(g, k, forced) = kernelize(g, k)
+		if k < 0:
+			return settle(budget, None)
+	with phase(stats, 'bound'):
+		if lower_bound(g, (), k + 1) > k:
+			return settle(budget, None)
+	if anytime_start(g, k, None, budget, lambda soln: relabel(lift(soln, forced), labels)):
+		return settle(budget, budget.best)
+	report = best = None
+	if budget is not None and workers == 1:
+		report = lambda soln: budget.improve(relabel(lift(soln, forced), labels))
+		best = len(budget.best) - len(forced)
+	with phase(stats, 'search'), budget.running() if budget else nullcontext():
+		soln = mif_fvs(g, k, workers, memo, stats, search, report, best)
+	return settle(budget, relabel(lift(soln, forced), labels))
@@ -1,41 +1,56 @@
+import argparse
 import os
-import sys
 from benchmark import *
-
+from treewidth import fvs_auto
+
+DATA_SETS = [
+	("tiny", "data/00_tiny.graphs"),
+	("small", "data/01_small_n.graphs"),
+	("medium", "data/02_medium_n.graphs"),
+	("large", "data/03_large_n.graphs"),
+	("k12_large", "data/04_k12_large.graphs"),
+	("no_instances", "data/05_no_instances.graphs")
+]
+
+# The exact solvers, run by default.
+ALGORITHMS = [("ic", fvs_via_ic), ("mif", fvs_via_mif)]
+
+# Run only when asked for. fvs_via_approx answers NO whenever its FVS is larger
+# than k, which proves nothing, so its "found" records are not comparable with
+# those of the exact solvers (outside --anytime, where they stay unproven).
+EXTRA_ALGORITHMS = [("approx", fvs_via_approx), ("auto", fvs_auto)]
+
+# Benchmark the solvers on the chosen data sets, writing one JSON-lines file
+# per data set and solver to results/. Rerunning resumes unfinished files.
 def main():
+	parser = argparse.ArgumentParser()
+	parser.add_argument("sets", nargs="*", default=["tiny", "no_instances"],
+		help="data sets to run (default: tiny no_instances)")
+	parser.add_argument("--workers", type=int, default=1, help="instances solved at once")
+	parser.add_argument("--timeout", type=float, default=TEN_MINUTES, help="seconds per instance")
+	parser.add_argument("--stats", action="store_true", help="record search statistics")
+	parser.add_argument("--anytime", action="store_true", help="record the best FVS found on timeouts")
+	parser.add_argument("--algorithms", nargs="+", default=[name for (name, _) in ALGORITHMS],
+		choices=[name for (name, _) in ALGORITHMS + EXTRA_ALGORITHMS],
+		help="solvers to run (default: ic mif)")
+	args = parser.parse_args()
+
 	# Create output dir.
 	os.makedirs('results', mode=0o775, exist_ok=True)
 
-	sys.setrecursionlimit(10000)
-
-	# Load data.
-	data_sets = [
-		("tiny", "data/00_tiny.graphs"),
-		("small", "data/01_small_n.graphs"),
-		("medium", "data/02_medium_n.graphs"),
-		("large", "data/03_large_n.graphs"),
-		("k12_large", "data/04_k12_large.graphs"),
-		("no_instances", "data/05_no_instances.graphs")
-	]
-
-	# Set of tests to run.
-	run = {"tiny", "no_instances"}
-
-	for (name, filename) in data_sets:
-		if name not in run:
+	for (name, filename) in DATA_SETS:
+		if name not in args.sets:
 			continue
 
 		print("Now processing:", name)
-		graphs = from_disk(filename)
-
-		ic_results = time_all(graphs, alg=fvs_via_ic)
-		to_disk(ic_results, 'results/{}_ic.results'.format(name))
+		graphs = load_instances(filename)
 
-		mif_results = time_all(graphs, alg=fvs_via_mif)
-		to_disk(mif_results, 'results/{}_mif.results'.format(name))
+		for (alg_name, alg) in ALGORITHMS + EXTRA_ALGORITHMS:
+			if alg_name not in args.algorithms:
+				continue
+			results_file = 'results/{}_{}.jsonl'.format(name, alg_name)
+			run_benchmark(graphs, alg, results_file, args.workers, args.timeout, args.stats, args.anytime)
 
-		del ic_results
-		del mif_results
 		del graphs
 
 if __name__ == "__main__":
@@ -1,8 +1,10 @@
 import random
 import pickle
+import numpy as np
 
 from fvs import *
 from random import randint
+from dataset import DatasetWriter
 
 # Split an integer into a sum.
 # Not very "fair", but nice and simple.
@@ -69,3 +71,116 @@ def to_disk(data, filename):
 # Generate a bunch of graphs.
 def generate_collection(k_min, k_max, q, graphs_per_k):
 	return [(generate_custom(k, q), k) for k in range(k_min, k_max) for _ in range(graphs_per_k)]
+
+# Component kinds of the batch generator.
+LINE = 0
+CYCLE = 1
+COMPLETE = 2
+
+# The components of an instance of generate_custom(k, q), drawn from the NumPy
+# generator `rng`: their kinds and sizes, in a random order.
+def batch_components(k: int, q: int, rng) -> (np.ndarray, np.ndarray):
+	num_lines = rng.integers(0, q + 1)
+	num_cycles = rng.integers(0, k)
+	# Split the rest of k into FVS sizes of complete graphs, as in split.
+	parts = []
+	rest = k - num_cycles
+	while rest > 0:
+		parts.append(rng.integers(1, rest + 1))
+		rest -= parts[-1]
+
+	kinds = np.repeat([LINE, CYCLE, COMPLETE], [num_lines, num_cycles, len(parts)])
+	sizes = np.concatenate([
+		rng.integers(1, k + 1, num_lines),
+		rng.integers(3, q + 4, num_cycles),
+		np.array(parts, dtype=np.int64) + 2])
+	order = rng.permutation(len(kinds))
+	return (kinds[order], sizes[order])
+
+# The edges of paths, or of cycles if `closed`, on `sizes` consecutive vertices
+# starting at each of `offsets`, as an (m, 2) array.
+def batch_paths(offsets: np.ndarray, sizes: np.ndarray, closed: bool) -> np.ndarray:
+	lengths = sizes - 1
+	starts = np.repeat(offsets, lengths)
+	steps = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+	edges = np.stack([starts + steps, starts + steps + 1], axis=1)
+	if closed:
+		edges = np.concatenate([edges, np.stack([offsets + sizes - 1, offsets], axis=1)])
+	return edges
+
+# The edges of complete graphs on `sizes` consecutive vertices starting at each
+# of `offsets`, as an (m, 2) array.
+def batch_complete(offsets: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+	edges = [np.empty((0, 2), dtype=np.int64)]
+	for size in np.unique(sizes):
+		(us, vs) = np.triu_indices(size, 1)
+		starts = offsets[sizes == size][:, None]
+		edges.append(np.stack([(starts + us).ravel(), (starts + vs).ravel()], axis=1))
+	return np.concatenate(edges)
+
+# Generate instances like generate_custom(k, q) for each k in `ks`: the same
+# kinds of components, with a minimum FVS of size exactly k, joined by single
+# edges into a tree of components. The edges of the whole batch are built with
+# array operations rather than one graph at a time. `seed` seeds NumPy's
+# generator, or may be a numpy.random.Generator.
+# returns: [(n, k, edges)], with edges an (m, 2) array of vertices 0 .. n-1
+def generate_batch(ks, q: int, seed=None) -> list:
+	rng = np.random.default_rng(seed)
+	ks = list(ks)
+	plans = [batch_components(k, q, rng) for k in ks]
+	kinds = np.concatenate([kinds for (kinds, _) in plans])
+	sizes = np.concatenate([sizes for (_, sizes) in plans])
+	counts = np.array([len(kinds) for (kinds, _) in plans])
+
+	# Number the vertices of the whole batch consecutively.
+	offsets = np.cumsum(sizes) - sizes
+	orders = np.add.reduceat(sizes, np.cumsum(counts) - counts) if len(sizes) else np.zeros(0, dtype=np.int64)
+	bases = np.cumsum(orders) - orders
+	first = np.zeros(len(sizes), dtype=bool)
+	first[np.cumsum(counts) - counts] = True
+
+	# Join each component but the first of its instance to a random earlier
+	# vertex of the instance, which keeps the components' cycles apart.
+	joined = ~first
+	instance_base = np.repeat(bases, counts)[joined]
+	earlier = rng.integers(instance_base, offsets[joined])
+	later = offsets[joined] + rng.integers(0, sizes[joined])
+
+	is_line = kinds == LINE
+	is_cycle = kinds == CYCLE
+	is_complete = kinds == COMPLETE
+	edges = np.concatenate([
+		batch_paths(offsets[is_line], sizes[is_line], False),
+		batch_paths(offsets[is_cycle], sizes[is_cycle], True),
+		batch_complete(offsets[is_complete], sizes[is_complete]),
+		np.stack([earlier, later], axis=1)])
+
+	# Sort the edges by instance and split them up.
+	edges.sort(axis=1)
+	edges = edges[np.lexsort((edges[:, 1], edges[:, 0]))]
+	cuts = np.searchsorted(edges[:, 0], bases)
+	batch = []
+	for (i, k) in enumerate(ks):
+		end = cuts[i + 1] if i + 1 < len(ks) else len(edges)
+		batch.append((int(orders[i]), k, edges[cuts[i]:end] - bases[i]))
+	return batch
+
+# The MultiGraph with the given number of vertices and (m, 2) array of edges.
+def batch_graph(n: int, edges: np.ndarray) -> MultiGraph:
+	g = MultiGraph()
+	g.add_nodes_from(range(n))
+	g.add_edges_from(edges.tolist())
+	return g
+
+# Generate a collection like generate_collection with generate_batch, streaming
+# it to a binary dataset (see dataset.py) `batch_size` instances at a time.
+def write_collection(filename, k_min, k_max, q, graphs_per_k, seed=None, batch_size=64):
+	rng = np.random.default_rng(seed)
+	ks = [k for k in range(k_min, k_max) for _ in range(graphs_per_k)]
+	with DatasetWriter(filename) as writer:
+		for start in range(0, len(ks), batch_size):
+			for (n, k, edges) in generate_batch(ks[start:start + batch_size], q, rng):
+				# The edges are sorted with u <= v, as the CSR arrays need.
+				indptr = np.zeros(n + 1, dtype=np.uint32)
+				np.cumsum(np.bincount(edges[:, 0], minlength=n), out=indptr[1:])
+				writer.add_csr(n, k, indptr, np.ascontiguousarray(edges[:, 1], dtype=np.uint32))
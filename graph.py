@@ -0,0 +1,510 @@
+# Compact multigraph used internally by the FVS solvers.
+#
+# Vertices are the integers 0 .. n-1. `adj[v]` maps each neighbour of a live
+# vertex v to the multiplicity of the edge between them, and is None once v has
+# been removed. A self-loop on v is stored as adj[v][v] and contributes 2 to the
+# degree of v (as in NetworkX). Deleting a vertex costs O(deg v), and copying a
+# graph only copies the per-vertex dicts, so the solvers avoid NetworkX's
+# dict-of-dict-of-dict allocations on their hot paths.
+#
+# For backtracking searches a graph can record its changes on a trail: while
+# `trail` is a list, every mutation appends a record (undo_fn, *args) that
+# reverts it. Other structures may push their own records onto the same list,
+# and `undo(trail, mark)` rolls everything back to an earlier length of the
+# trail in LIFO order.
+#
+# A graph also keeps `edge_hash`, a hash of its edges that every mutation (and
+# so every undo) updates in O(1) per edge, so that search states can be looked
+# up in a cache without reading the whole graph. Each vertex v has a fixed
+# random code r_v below 2^30 (so that products of codes stay small), and the
+# hash is the sum of c * r_u * r_v over the edges uv of multiplicity c. Two
+# different graphs on the same vertex numbering collide with probability at
+# most 2^-29.
+
+import random
+
+# The codes r_v, drawn from a fixed seed so that every process agrees on them,
+# and extended as graphs with more vertices appear.
+_codes = []
+_rng = random.Random(0x5eed)
+
+def _extend_codes(n: int):
+	while len(_codes) < n:
+		_codes.append(_rng.randrange(1, 2**30))
+
+class Graph():
+	__slots__ = ('adj', 'vertices', 'm', 'edge_hash', 'trail')
+
+	def __init__(self, n=0):
+		self.adj = [{} for _ in range(n)]
+		self.vertices = set(range(n))
+		# Number of edges, counted with multiplicity.
+		self.m = 0
+		self.edge_hash = 0
+		self.trail = None
+		_extend_codes(n)
+
+	def __repr__(self):
+		return "Graph " + {v: self.adj[v] for v in self.vertices}.__repr__()
+
+	def __len__(self):
+		return len(self.vertices)
+
+	def __iter__(self):
+		return iter(self.vertices)
+
+	def __contains__(self, v):
+		return v in self.vertices
+
+	def order(self) -> int:
+		return len(self.vertices)
+
+	def copy(self) -> 'Graph':
+		gx = Graph()
+		gx.adj = [None if a is None else a.copy() for a in self.adj]
+		gx.vertices = set(self.vertices)
+		gx.m = self.m
+		gx.edge_hash = self.edge_hash
+		return gx
+
+	# Induced subgraph on `vs`, keeping the vertex numbering of the parent.
+	def subgraph(self, vs) -> 'Graph':
+		vs = set(vs)
+		gx = Graph()
+		gx.adj = [None] * len(self.adj)
+		degrees = 0
+		h = 0
+		for v in vs:
+			a = {u: c for (u, c) in self.adj[v].items() if u in vs}
+			gx.adj[v] = a
+			degrees += sum(a.values()) + a.get(v, 0)
+			h += sum(c * _codes[u] for (u, c) in a.items() if u <= v) * _codes[v]
+		gx.vertices = vs
+		gx.m = degrees // 2
+		gx.edge_hash = h
+		return gx
+
+	# Add vertex v of G, with its edges to the vertices already here, so that
+	# an induced subgraph of G (such as subgraph(())) can grow one vertex at a
+	# time in O(deg v).
+	def add_from(self, g: 'Graph', v):
+		a = {u: c for (u, c) in g.adj[v].items() if u in self.vertices or u == v}
+		self.adj[v] = a
+		self.vertices.add(v)
+		h = 0
+		for (u, c) in a.items():
+			if u != v:
+				self.adj[u][v] = c
+			self.m += c
+			h += c * _codes[u]
+		self.edge_hash += h * _codes[v]
+
+	def degree(self, v) -> int:
+		a = self.adj[v]
+		return sum(a.values()) + a.get(v, 0)
+
+	def neighbours(self, v):
+		return self.adj[v].keys()
+
+	def multiplicity(self, u, v) -> int:
+		return self.adj[u].get(v, 0)
+
+	def has_edge(self, u, v) -> bool:
+		return v in self.adj[u]
+
+	def has_loop(self, v) -> bool:
+		return v in self.adj[v]
+
+	# Does G have no self-loops and no parallel edges?
+	def is_simple(self) -> bool:
+		return all(c == 1 and u != v for v in self.vertices for (u, c) in self.adj[v].items())
+
+	# Iterate over the edges (u, v) with u <= v, repeating multi-edges.
+	def edges(self):
+		for u in self.vertices:
+			for (v, c) in self.adj[u].items():
+				if u <= v:
+					for _ in range(c):
+						yield (u, v)
+
+	# Add a new isolated vertex and return its index.
+	def add_vertex(self) -> int:
+		v = len(self.adj)
+		self.adj.append({})
+		self.vertices.add(v)
+		_extend_codes(v + 1)
+		return v
+
+	def add_edge(self, u, v, count=1):
+		self._add_edge(u, v, count)
+		if self.trail is not None:
+			self.trail.append((self._remove_edge, u, v, count))
+
+	def remove_edge(self, u, v, count=1):
+		self._remove_edge(u, v, count)
+		if self.trail is not None:
+			self.trail.append((self._add_edge, u, v, count))
+
+	def _add_edge(self, u, v, count):
+		au = self.adj[u]
+		au[v] = au.get(v, 0) + count
+		if u != v:
+			av = self.adj[v]
+			av[u] = av.get(u, 0) + count
+		self.m += count
+		self.edge_hash += count * _codes[u] * _codes[v]
+
+	def _remove_edge(self, u, v, count):
+		au = self.adj[u]
+		c = au[v] - count
+		assert c >= 0, "Removing non-existent edge"
+		if c == 0:
+			del au[v]
+			if u != v:
+				del self.adj[v][u]
+		else:
+			au[v] = c
+			if u != v:
+				self.adj[v][u] = c
+		self.m -= count
+		self.edge_hash -= count * _codes[u] * _codes[v]
+
+	# Delete v and all of its edges in O(deg v).
+	def remove_vertex(self, v):
+		av = self.adj[v]
+		codes = _codes
+		h = 0
+		for (u, c) in av.items():
+			if u != v:
+				del self.adj[u][v]
+			self.m -= c
+			h += c * codes[u]
+		self.edge_hash -= h * _codes[v]
+		self.adj[v] = None
+		self.vertices.remove(v)
+		if self.trail is not None:
+			self.trail.append((self._restore_vertex, v, av))
+
+	# Inverse of remove_vertex, given the removed adjacency dict.
+	def _restore_vertex(self, v, av):
+		self.adj[v] = av
+		self.vertices.add(v)
+		codes = _codes
+		h = 0
+		for (u, c) in av.items():
+			if u != v:
+				self.adj[u][v] = c
+			self.m += c
+			h += c * codes[u]
+		self.edge_hash += h * _codes[v]
+
+	def remove_vertices(self, vs):
+		for v in vs:
+			self.remove_vertex(v)
+
+	# Bypass a vertex of degree 2 (without a self-loop): delete it and join its
+	# two neighbours with a new edge, which may be parallel to an existing edge
+	# or, if both edges went to the same vertex, a self-loop.
+	# Returns the two (possibly equal) neighbours.
+	def contract(self, v) -> (int, int):
+		av = self.adj[v]
+		assert v not in av and sum(av.values()) == 2, "Contracting vertex of degree != 2"
+		ends = [u for (u, c) in av.items() for _ in range(c)]
+		self.remove_vertex(v)
+		self.add_edge(ends[0], ends[1])
+		return (ends[0], ends[1])
+
+	# Merge the vertices `vs` into u. Edges between merged vertices disappear,
+	# while edges leaving the merged set are redirected to u (adding up
+	# multiplicities). Costs O(sum of degrees of vs).
+	def merge(self, u, vs):
+		for v in vs:
+			if v == u:
+				continue
+			for (x, c) in list(self.adj[v].items()):
+				if x != u and x != v and x not in vs:
+					self.add_edge(u, x, c)
+			self.remove_vertex(v)
+
+	# Merge the vertices `vs` into u (as in merge), then delete every vertex
+	# left joined to u by two or more edges. Returns the deleted vertices.
+	# Costs O(sum of degrees of u, vs and the deleted vertices).
+	def contract_set(self, u, vs) -> list:
+		self.merge(u, vs)
+		removed = [x for (x, c) in self.adj[u].items() if c >= 2 and x != u]
+		self.remove_vertices(removed)
+		return removed
+
+# Disjoint-set forest over a growing set of vertices, tracking the connected
+# components of an induced forest such as G[W]. Union by rank without path
+# compression keeps every operation cheap to undo, so it can log its changes on
+# a trail shared with a Graph.
+class DisjointSet():
+	__slots__ = ('parent', 'rank', 'trail')
+
+	def __init__(self, vs=()):
+		self.parent = {v: v for v in vs}
+		self.rank = dict.fromkeys(self.parent, 0)
+		self.trail = None
+
+	def __len__(self):
+		return len(self.parent)
+
+	def __iter__(self):
+		return iter(self.parent)
+
+	def __contains__(self, v):
+		return v in self.parent
+
+	def copy(self) -> 'DisjointSet':
+		d = DisjointSet()
+		d.parent = self.parent.copy()
+		d.rank = self.rank.copy()
+		return d
+
+	def add(self, v):
+		self.parent[v] = v
+		self.rank[v] = 0
+		if self.trail is not None:
+			self.trail.append((self._discard, v))
+
+	def find(self, v):
+		parent = self.parent
+		while parent[v] != v:
+			v = parent[v]
+		return v
+
+	# Join the sets of u and v. Returns False if they were already joined.
+	def union(self, u, v) -> bool:
+		ru = self.find(u)
+		rv = self.find(v)
+		if ru == rv:
+			return False
+		rank = self.rank
+		if rank[ru] > rank[rv]:
+			(ru, rv) = (rv, ru)
+		self.parent[ru] = rv
+		grown = rank[ru] == rank[rv]
+		if grown:
+			rank[rv] += 1
+		if self.trail is not None:
+			self.trail.append((self._split, ru, rv, grown))
+		return True
+
+	def _discard(self, v):
+		del self.parent[v]
+		del self.rank[v]
+
+	def _split(self, ru, rv, grown):
+		self.parent[ru] = ru
+		if grown:
+			self.rank[rv] -= 1
+
+# Components of the induced subgraph G[vs] as a DisjointSet, or None if G[vs]
+# contains a cycle.
+def induced_forest(g: Graph, vs) -> DisjointSet:
+	d = DisjointSet()
+	for v in vs:
+		if v in g.vertices and not add_to_forest(g, d, v):
+			return None
+	return d
+
+# Would adding v to the forest tracked by D create a cycle? That is the case
+# exactly when v has a self-loop or two edges into the same component of D,
+# which takes O(deg v) to check.
+def closes_cycle(g: Graph, d: DisjointSet, v) -> bool:
+	roots = set()
+	for (u, c) in g.adj[v].items():
+		if u == v:
+			return True
+		if u in d.parent:
+			if c >= 2:
+				return True
+			r = d.find(u)
+			if r in roots:
+				return True
+			roots.add(r)
+	return False
+
+# Add v to D, joining it to the components of its neighbours in D.
+# Returns False (leaving D unchanged) if this would create a cycle.
+def add_to_forest(g: Graph, d: DisjointSet, v) -> bool:
+	if closes_cycle(g, d, v):
+		return False
+	d.add(v)
+	for u in g.adj[v]:
+		if u in d.parent:
+			d.union(v, u)
+	return True
+
+# Revert every change recorded on `trail` after its first `mark` records.
+def undo(trail: list, mark: int):
+	while len(trail) > mark:
+		record = trail.pop()
+		record[0](*record[1:])
+
+# Union-find lookup with path halving, used for the one-off checks below.
+def _find(parent: dict, v):
+	while parent[v] != v:
+		parent[v] = parent[parent[v]]
+		v = parent[v]
+	return v
+
+# Is the subgraph induced by `vs` (default: all of G) a forest?
+# Self-loops and parallel edges count as cycles, and vertices of `vs` that are
+# no longer in G are ignored. Runs in O(n + m) without building the subgraph.
+def is_forest(g: Graph, vs=None) -> bool:
+	if vs is None:
+		vs = g.vertices
+	parent = {v: v for v in vs if v in g.vertices}
+	for u in parent:
+		for (v, c) in g.adj[u].items():
+			if v not in parent:
+				continue
+			if u == v or c >= 2:
+				return False
+			if u < v:
+				ru = _find(parent, u)
+				rv = _find(parent, v)
+				if ru == rv:
+					return False
+				parent[ru] = rv
+	return True
+
+# Connected components of the subgraph induced by `vs` (default: all of G),
+# as a list of sets. With `sources`, only the components containing one of
+# them are found, in time linear in their size.
+def connected_components(g: Graph, vs=None, sources=None) -> list:
+	if vs is None:
+		vs = g.vertices
+	if sources is None:
+		sources = vs
+	seen = set()
+	components = []
+	for s in sources:
+		if s in seen:
+			continue
+		seen.add(s)
+		component = {s}
+		stack = [s]
+		while stack:
+			v = stack.pop()
+			for u in g.adj[v]:
+				if u not in seen and u in vs:
+					seen.add(u)
+					component.add(u)
+					stack.append(u)
+		components.append(component)
+	return components
+
+# Biconnected components (blocks) of the subgraph induced by `vs` (default: all
+# of G), as a list of vertex sets. Bridges are blocks of two vertices, parallel
+# edges make their endpoints a block of their own, and self-loops are ignored.
+# Uses Tarjan's algorithm with an explicit stack.
+def biconnected_components(g: Graph, vs=None) -> list:
+	if vs is None:
+		vs = g.vertices
+	index = {}
+	low = {}
+	blocks = []
+	for s in vs:
+		if s in index:
+			continue
+		index[s] = low[s] = len(index)
+		stack = [(s, None, iter(g.adj[s].items()))]
+		edges = []
+		while stack:
+			(v, parent, neighbours) = stack[-1]
+			child = None
+			for (u, c) in neighbours:
+				if u == v or u not in vs:
+					continue
+				# One copy of the edge to the parent is the tree edge itself.
+				if u == parent and c == 1:
+					continue
+				if u not in index:
+					child = u
+					break
+				if index[u] < index[v]:
+					low[v] = min(low[v], index[u])
+					edges.append((v, u))
+			if child is not None:
+				index[child] = low[child] = len(index)
+				edges.append((v, child))
+				stack.append((child, v, iter(g.adj[child].items())))
+				continue
+
+			stack.pop()
+			if parent is not None:
+				low[parent] = min(low[parent], low[v])
+				if low[v] >= index[parent]:
+					block = set()
+					while True:
+						(a, b) = edges.pop()
+						block.add(a)
+						block.add(b)
+						if (a, b) == (parent, v):
+							break
+					blocks.append(block)
+	return blocks
+
+# A canonical form of the subgraph induced by `vs`, with an optional
+# distinguished vertex c. Vertices are ordered by colour refinement, ties broken
+# by vertex number, and the key lists the edges under that order. Equal keys
+# always mean isomorphic graphs, since the key describes the graph completely.
+# Isomorphic copies share a key when refinement tells all vertices apart, or
+# when every order of each colour class looks the same (as in complete graphs).
+# Returns (key, order), where order[i] is the vertex numbered i in the key.
+def canonical_form(g: Graph, vs, c=None) -> (tuple, list):
+	vs = set(vs)
+
+	def ranks(signature):
+		values = sorted(set(signature.values()))
+		rank = {x: i for (i, x) in enumerate(values)}
+		return {v: rank[x] for (v, x) in signature.items()}
+
+	colour = ranks({v: (v == c, sum(m for (u, m) in g.adj[v].items() if u in vs)) for v in vs})
+	classes = len(set(colour.values()))
+	while True:
+		refined = ranks({v: (colour[v], tuple(sorted((colour[u], m)
+			for (u, m) in g.adj[v].items() if u in vs))) for v in vs})
+		refined_classes = len(set(refined.values()))
+		if refined_classes == classes:
+			break
+		(colour, classes) = (refined, refined_classes)
+
+	order = sorted(vs, key=lambda v: (colour[v], v))
+	position = {v: i for (i, v) in enumerate(order)}
+	edges = sorted((position[u], position[v], m)
+		for u in vs for (v, m) in g.adj[u].items() if v in vs and position[u] <= position[v])
+	key = (len(vs), -1 if c is None else position[c], tuple(edges))
+	return (key, order)
+
+# Convert a NetworkX (multi)graph to a Graph.
+# Returns the graph and the list of original labels, indexed by vertex.
+# A Graph is copied rather than converted, and comes back with labels None.
+def from_networkx(g) -> ('Graph', list):
+	if isinstance(g, Graph):
+		return (g.copy(), None)
+	labels = list(g.nodes())
+	index = {v: i for (i, v) in enumerate(labels)}
+	gx = Graph(len(labels))
+	for (u, v) in g.edges():
+		gx.add_edge(index[u], index[v])
+	return (gx, labels)
+
+# Convert a Graph back to a NetworkX MultiGraph, optionally restoring labels.
+def to_networkx(g: Graph, labels=None):
+	from networkx import MultiGraph
+	if labels is None:
+		labels = range(len(g.adj))
+	gx = MultiGraph()
+	gx.add_nodes_from(labels[v] for v in g.vertices)
+	gx.add_edges_from((labels[u], labels[v]) for (u, v) in g.edges())
+	return gx
+
+# Map a set of vertices back to their original labels (None is passed through).
+def relabel(vs, labels):
+	if vs is None or labels is None:
+		return vs
+	return {labels[v] for v in vs}
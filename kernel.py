@@ -0,0 +1,317 @@
+# Kernelization for FVS, run once on (G, k) before a solver.
+#
+# The reduction rules are:
+# 1. A vertex with a self-loop is in every FVS: take it and decrease k.
+# 2. An edge of multiplicity > 2 can be reduced to a double edge.
+# 3. A vertex of degree <= 1 is on no cycle: delete it.
+# 4. A vertex of degree 2 can be bypassed, joining its neighbours directly.
+# 5. A vertex v with k + 1 cycles through it that are disjoint apart from v (a
+#    flower) is in every FVS of size <= k: take it and decrease k.
+# 6. The FVS X of the 2-approximation (two_approx_fvs in approx.py) has size at
+#    most 2k if there is an FVS of size <= k.
+# 7. The q-expansion rule of Thomassé, with q = 2. For a vertex v, a set H not
+#    containing v that hits every cycle through v is X - v together with the
+#    fewest vertices hitting the cycles through v in the forest G - X plus v
+#    (see petal_cover). Those cycles have as many disjoint petals, so if more
+#    than k are needed, v is taken as in rule 5, and otherwise |H| <= 3k. v
+#    has at most one edge into each component of G - H - v, and more than k of
+#    them with a cycle make a NO-instance. If at least 2|H| tree components
+#    next to v have neighbours in H, the expansion lemma gives X' ⊆ H and some
+#    of those components with neighbours only in X' and v, two for each vertex
+#    of X' alone. Some smallest FVS then holds v or all of X', so the edges
+#    from v into these components can be swapped for double edges to X'.
+# 8. Once no rule applies, every vertex has degree at most 4|H| + k <= 13k,
+#    and the minimum degree is 3. If S is an FVS of size <= k, the forest
+#    G - S has fewer edges than vertices, so it has at most (the sum of the
+#    degrees in S) - 2 vertices. With more vertices than k plus the k largest
+#    degrees less 2, which is at most 13k², (G, k) is a NO-instance.
+#
+# The kernel keeps the vertex numbering of the input, so a solution of the
+# kernel lifts to the input by adding back the forced vertices.
+
+from graph import Graph, from_networkx, to_networkx, relabel, connected_components
+
+# Greedily pack cycles through v that are vertex-disjoint apart from v, and
+# return how many were found (stopping at `limit`). The count is a lower bound
+# on the size of the largest such flower.
+def flower(g: Graph, v, limit: int) -> int:
+	petals = 0
+	used = {v}
+
+	# A double edge to v is a petal on its own.
+	for (u, c) in g.adj[v].items():
+		if u != v and c >= 2:
+			petals += 1
+			used.add(u)
+			if petals >= limit:
+				return petals
+
+	while petals < limit:
+		petal = find_petal(g, v, used)
+		if petal is None:
+			break
+		petals += 1
+		used.update(petal)
+
+	return petals
+
+# Find a path in G - used joining two neighbours of v, by a breadth-first search
+# started from all of them at once. Returns the vertices of the path, or None.
+def find_petal(g: Graph, v, used: set) -> list:
+	parent = {}
+	root = {}
+	frontier = []
+	for u in g.adj[v]:
+		if u not in used:
+			parent[u] = None
+			root[u] = u
+			frontier.append(u)
+
+	while frontier:
+		next_frontier = []
+		for x in frontier:
+			for y in g.adj[x]:
+				if y in used or y == x:
+					continue
+				if y not in root:
+					parent[y] = x
+					root[y] = root[x]
+					next_frontier.append(y)
+				elif root[y] != root[x]:
+					path = []
+					for z in [x, y]:
+						while z is not None:
+							path.append(z)
+							z = parent[z]
+					return path
+		frontier = next_frontier
+	return None
+
+# The fewest vertices hitting every cycle through v in G - others, where
+# `others` is an FVS of G - v, so that G - others is a forest plus v. Each tree
+# of the forest is scanned leaves first: a vertex that two paths from v's edges
+# reach (or one of them and an edge to v, or a double edge to v) closes a petal,
+# and is taken, cutting its subtree off. The petals closed are disjoint apart
+# from v, and as many as the vertices taken, so both are optimal.
+def petal_cover(g: Graph, v, others: set) -> set:
+	av = g.adj[v]
+	cover = set()
+	seen = {v}
+	for root in av:
+		if root in seen or root in others:
+			continue
+		seen.add(root)
+		parent = {root: None}
+		order = []
+		stack = [root]
+		while stack:
+			x = stack.pop()
+			order.append(x)
+			for y in g.adj[x]:
+				if y not in seen and y not in others:
+					seen.add(y)
+					parent[y] = x
+					stack.append(y)
+		paths = dict.fromkeys(order, 0)
+		for x in reversed(order):
+			reached = av.get(x, 0) + paths[x]
+			if reached >= 2:
+				cover.add(x)
+			elif reached == 1 and parent[x] is not None:
+				paths[parent[x]] += 1
+	return cover
+
+# The expansion lemma for q = 2, on the bipartite graph between the vertices of
+# `h` and the items of the list `nbrs` of nonempty subsets of h, given at least
+# 2|h| items. Returns (xs, ys): a nonempty xs ⊆ h and the indices ys of items
+# with neighbours in xs only, where each vertex of xs is matched to two items
+# of ys of its own. Two copies of each vertex of h are matched to the items,
+# and xs is the part of h not reachable from an unmatched copy by alternating
+# paths.
+def expansion(h: set, nbrs: list) -> (set, list):
+	items = {x: [] for x in h}
+	for (i, nb) in enumerate(nbrs):
+		for x in nb:
+			items[x].append(i)
+	copies = [(x, c) for x in h for c in (0, 1)]
+	matched = {}
+	owner = {}
+	for a in copies:
+		# Search for an augmenting path from a, breadth first.
+		reached_by = {}
+		frontier = [a]
+		end = None
+		while frontier and end is None:
+			next_frontier = []
+			for b in frontier:
+				for i in items[b[0]]:
+					if i in reached_by:
+						continue
+					reached_by[i] = b
+					if i not in owner:
+						end = i
+						break
+					next_frontier.append(owner[i])
+				if end is not None:
+					break
+			frontier = next_frontier
+		while end is not None:
+			b = reached_by[end]
+			(end, matched[b]) = (matched.get(b), end)
+			owner[matched[b]] = b
+
+	reached = set()
+	stack = [a for a in copies if a not in matched]
+	reached_copies = set(stack)
+	while stack:
+		a = stack.pop()
+		for i in items[a[0]]:
+			if i not in reached:
+				reached.add(i)
+				b = owner[i]
+				if b not in reached_copies:
+					reached_copies.add(b)
+					stack.append(b)
+	xs = {x for x in h if (x, 0) not in reached_copies and (x, 1) not in reached_copies}
+	ys = [i for i in range(len(nbrs)) if i not in reached]
+	return (xs, ys)
+
+# Rules 6 and 7, over the vertices of high enough degree, of G with the other
+# rules exhausted. Returns (k', touched): k' is lowered for the vertices taken
+# into `forced` (and negative for a NO-instance), and touched lists the
+# vertices whose edges changed.
+def expansion_rules(g: Graph, k: int, forced: set) -> (int, list):
+	from approx import two_approx_fvs
+	approx = two_approx_fvs(g)
+	# Rule 6.
+	if len(approx) > 2 * k:
+		return (-1, [])
+	touched = []
+	for v in sorted(g.vertices, key=g.degree, reverse=True):
+		others = approx.difference({v})
+		# There are at most deg(v) components next to v, and |H| >= |others|.
+		if g.degree(v) < max(2 * len(others), 2):
+			break
+		cover = petal_cover(g, v, others)
+		if len(cover) > k:
+			touched.extend(g.adj[v])
+			g.remove_vertex(v)
+			forced.add(v)
+			k -= 1
+			if k < 0:
+				break
+			approx = others
+			continue
+		h = others.union(cover)
+		av = g.adj[v]
+		cyclic = 0
+		trees = []
+		for component in connected_components(g, g.vertices.difference(h, {v})):
+			inner = sum(c for x in component for (y, c) in g.adj[x].items() if y in component)
+			if inner > 2 * (len(component) - 1):
+				cyclic += 1
+				continue
+			ends = [x for x in component if x in av]
+			nb = {y for x in component for y in g.adj[x] if y in h}
+			if ends and nb:
+				trees.append((ends[0], nb))
+		if cyclic > k:
+			return (-1, touched)
+		if not trees or len(trees) < 2 * len(h):
+			continue
+		(xs, ys) = expansion(h, [nb for (_, nb) in trees])
+		for i in ys:
+			u = trees[i][0]
+			g.remove_edge(v, u)
+			touched.append(u)
+		for x in xs:
+			if g.multiplicity(v, x) < 2:
+				g.add_edge(v, x, 2 - g.multiplicity(v, x))
+		touched.extend(xs)
+		touched.append(v)
+	return (k, touched)
+
+# Reduce the instance (G, k) with the rules above. Returns (G', k', forced),
+# where G' has an FVS of size <= k' exactly when G has one of size <= k, and
+# forced is the set of vertices the rules put in the solution. A negative k'
+# means that (G, k) is a NO-instance.
+# A NetworkX graph gives a NetworkX kernel, with forced vertices as labels.
+def kernelize(g, k: int) -> (Graph, int, set):
+	(g, labels) = from_networkx(g)
+	forced = set()
+	queue = list(g.vertices)
+	queued = set(queue)
+
+	def push(vs):
+		for u in vs:
+			if u not in queued:
+				queued.add(u)
+				queue.append(u)
+
+	while k >= 0:
+		while queue and k >= 0:
+			v = queue.pop()
+			queued.discard(v)
+			if v not in g.vertices:
+				continue
+			av = g.adj[v]
+
+			# Rule 1.
+			if v in av:
+				neighbours = [u for u in av if u != v]
+				g.remove_vertex(v)
+				forced.add(v)
+				k -= 1
+				push(neighbours)
+				continue
+
+			# Rule 2.
+			for (u, c) in list(av.items()):
+				if c > 2:
+					g.remove_edge(v, u, c - 2)
+
+			d = g.degree(v)
+			# Rule 3.
+			if d <= 1:
+				neighbours = list(av)
+				g.remove_vertex(v)
+				push(neighbours)
+			# Rule 4.
+			elif d == 2:
+				push(g.contract(v))
+
+		# Rule 5. Lowering k can enable it anywhere, so check all vertices
+		# of high enough degree once the local rules are exhausted.
+		if k < 0:
+			break
+		high = [v for v in g.vertices if g.degree(v) >= 2 * (k + 1)]
+		high.sort(key=g.degree, reverse=True)
+		for v in high:
+			if flower(g, v, k + 1) > k:
+				neighbours = list(g.adj[v])
+				g.remove_vertex(v)
+				forced.add(v)
+				k -= 1
+				push(neighbours)
+				break
+		if not queue:
+			(k, touched) = expansion_rules(g, k, forced)
+			push(touched)
+		if not queue:
+			break
+
+	# Rule 8.
+	if k >= 0 and g.order() > k:
+		degrees = sorted((g.degree(v) for v in g.vertices), reverse=True)
+		if g.order() > k + sum(degrees[:k]) - 2:
+			k = -1
+
+	if labels is not None:
+		return (to_networkx(g, labels), k, relabel(forced, labels))
+	return (g, k, forced)
+
+# Map a solution of the kernel back to a solution of the original instance.
+def lift(soln: set, forced: set) -> set:
+	if soln is None:
+		return None
+	return soln.union(forced)
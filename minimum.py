@@ -0,0 +1,111 @@
+# Minimum FVS, for graphs that come without a known k. The solvers only answer
+# "is there an FVS of size <= k?", so min_fvs searches over k with them:
+#
+# * sweep: ask for k = lower bound, lower bound + 1, ... until the answer is
+#   YES. Every NO answer costs a full search.
+# * binary: binary search between the lower bound of bounds.py and the size of
+#   the FVS found by local_search_fvs, which is also the answer if no smaller
+#   one exists. Every YES answer lowers the upper bound to the size found.
+# * incremental: iterative compression that raises k instead of giving up.
+#   When G[V_i] has no FVS of size k, the FVS of size k + 1 it has is minimum,
+#   so compression continues from that prefix with k + 1, and no vertex is
+#   added twice. Only fvs_via_ic works this way.
+#
+# All strategies return a minimum FVS of G, in the labels of G.
+
+from fvs import *
+from approx import local_search_fvs
+
+# Minimum FVS of G by asking `alg` for k = lower bound, lower bound + 1, ...
+def sweep_min_fvs(g: Graph, alg, stats, options) -> set:
+	with phase(stats, 'bound'):
+		k = lower_bound(g)
+	while True:
+		if stats is not None:
+			stats.count('budgets')
+		soln = alg(g, k, stats=stats, **options)
+		if soln is not None:
+			return soln
+		k += 1
+
+# Minimum FVS of G by binary search over k between the lower bound and the
+# size of an approximate FVS.
+def binary_min_fvs(g: Graph, alg, stats, options) -> set:
+	with phase(stats, 'bound'):
+		best = local_search_fvs(g)
+		low = lower_bound(g, (), len(best))
+	# Invariant: no FVS is smaller than `low`, and `best` is an FVS.
+	while low < len(best):
+		k = (low + len(best) - 1) // 2
+		if stats is not None:
+			stats.count('budgets')
+		soln = alg(g, k, stats=stats, **options)
+		if soln is None:
+			low = k + 1
+		else:
+			best = soln
+	return best
+
+# Minimum FVS of G by iterative compression with a growing k. The kernel is
+# taken for the size of the approximate FVS, which bounds the minimum, and its
+# connected components are solved separately.
+def incremental_min_fvs(g: Graph, alg, stats, options) -> set:
+	assert alg is fvs_via_ic, "Only fvs_via_ic can raise k incrementally"
+	order = options.get('order')
+	memo = options.get('memo')
+	search = options.get('search', 'dfs')
+	forced = set()
+	if options.get('kernel', True):
+		with phase(stats, 'kernel'):
+			(g, _, forced) = kernelize(g, len(local_search_fvs(g)))
+	soln = set()
+	with phase(stats, 'search'):
+		for component in connected_components(g):
+			soln.update(incremental_ic(g.subgraph(component), order, memo, stats, search))
+	return lift(soln, forced)
+
+# Iterative compression keeping a minimum FVS of G[V_i] for every prefix V_i
+# of the vertex order (see iterative_compression for `order`). Adding a vertex
+# raises the minimum by at most one, so when the FVS of size k + 1 cannot be
+# compressed, it is minimum and k goes up by one.
+def incremental_ic(g: Graph, order=None, memo=None, stats=None, search='dfs') -> set:
+	if order is None:
+		nodes = sorted(g.vertices)
+	else:
+		nodes = VERTEX_ORDERS.get(order, order)(g)
+
+	h = g.subgraph(())
+	soln = set()
+	forest = DisjointSet()
+	for v in nodes:
+		h.add_from(g, v)
+		if add_to_forest(h, forest, v):
+			continue
+
+		if stats is not None:
+			stats.count('rounds')
+		k = len(soln)
+		soln.add(v)
+		smaller = ic_compression(h, soln, k, None, memo, stats, search)
+		if smaller is None:
+			# Keep the FVS of size k + 1; the forest it leaves is unchanged.
+			continue
+		soln = smaller
+		forest = induced_forest(h, h.vertices.difference(soln))
+	return soln
+
+STRATEGIES = {
+	'sweep': sweep_min_fvs,
+	'binary': binary_min_fvs,
+	'incremental': incremental_min_fvs
+}
+
+# A minimum FVS of G (a NetworkX graph), found with one of STRATEGIES by calls
+# to the decision solver `alg`. The other options are passed on to `alg`, or
+# for the incremental strategy, read as those of fvs_via_ic (kernel, order,
+# memo and search). A SearchStats given as `stats` collects the statistics of
+# every call, with `budgets` counting the calls made.
+def min_fvs(g, strategy='incremental', alg=fvs_via_ic, stats=None, **options) -> set:
+	(g, labels) = from_networkx(g)
+	soln = STRATEGIES[strategy](g, alg, stats, options)
+	return relabel(soln, labels)
@@ -4,15 +4,16 @@ import matplotlib.pyplot as plt
 
 def time_vs_n():
 	plt.figure(figsize=(5, 3)) # inches
-	graphs = load_graphs('graphs.pickle')
+	graphs = load_instances('graphs.pickle')
 
-	results = time_all(graphs)
+	run_benchmark(graphs, fvs_via_ic, 'time_vs_n.jsonl')
+	results = [r for r in load_results('time_vs_n.jsonl') if r["status"] == "ok"]
 
 	# Lengths on the x axis.
-	x_data = [len(g) for g in graphs]
+	x_data = [r["n"] for r in results]
 
 	# Running times on the y axis.
-	y_data = [time for (_, time) in results]
+	y_data = [r["cpu"] for r in results]
 
 	plt.plot(x_data, y_data, 'ro')
 	# plt.show()
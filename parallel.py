@@ -0,0 +1,198 @@
+# Process pool for the parallel solver modes.
+#
+# Tasks are handed out one at a time from a small window of in-flight tasks, so
+# an idle worker always picks up the next pending task and tasks that will never
+# run are never sent. When a search only needs one answer, the first worker to find it
+# sets a shared stop flag: tasks that have not started yet return immediately,
+# running searches notice the flag via `cancelled()`, and the parent stops
+# generating new tasks. Branch-and-bound searches can also share the value of
+# their best solution so far through an Incumbent. A Budget stops the searches
+# of an anytime solver call the same way once its time is up.
+
+import itertools
+import multiprocessing as mp
+import queue
+import time
+from contextlib import contextmanager
+
+# The stop flag and best solution value shared with the pool (only set inside
+# worker processes).
+_stop = None
+_best = None
+
+# The Budget of the solver call running in this process, if any.
+_budget = None
+
+def _init_worker(stop, best):
+	global _stop, _best
+	_stop = stop
+	_best = best
+
+# Has another worker already answered the current search, or has the budget of
+# the current solver call run out? Always False outside a SearchPool worker and
+# without a Budget, so serial code can call it freely.
+def cancelled() -> bool:
+	return (_stop is not None and _stop.is_set()) or (_budget is not None and _budget.expired())
+
+# A time limit and cancellation token for an anytime solver call (see
+# fvs_via_ic). Searches run under it give up once `seconds` have passed or
+# cancel() is called, from another thread say. The solver reports each better
+# FVS it finds through improve(), which keeps it as `best` and passes it to
+# `on_improve`, and sets `proven` once its answer is final.
+class Budget():
+	def __init__(self, seconds=None, on_improve=None):
+		self.deadline = None if seconds is None else time.monotonic() + seconds
+		self.on_improve = on_improve
+		self.stopped = False
+		self.best = None
+		self.proven = False
+
+	def cancel(self):
+		self.stopped = True
+
+	def expired(self) -> bool:
+		return self.stopped or (self.deadline is not None and time.monotonic() >= self.deadline)
+
+	# Record an FVS, if it is smaller than the best so far.
+	def improve(self, fvs) -> bool:
+		if fvs is None or (self.best is not None and len(fvs) >= len(self.best)):
+			return False
+		self.best = set(fvs)
+		if self.on_improve is not None:
+			self.on_improve(self.best)
+		return True
+
+	# Make cancelled() follow this budget within a `with` block.
+	@contextmanager
+	def running(self):
+		global _budget
+		outer = _budget
+		_budget = self
+		try:
+			yield self
+		finally:
+			_budget = outer
+
+# The best value found so far by a maximising search, kept locally and, inside
+# a SearchPool worker, shared with every other worker of the pool. A search
+# with a `goal` can stop once it has found a solution of that value, and
+# `report` is called with each solution that improves on the local value.
+class Incumbent():
+	__slots__ = ('value', 'shared', 'goal', 'report')
+
+	def __init__(self, value=0, goal=None, report=None):
+		self.value = value
+		self.shared = _best
+		self.goal = goal
+		self.report = report
+		if self.shared is not None:
+			self.offer(value)
+
+	def get(self) -> int:
+		if self.shared is not None and self.shared.value > self.value:
+			self.value = self.shared.value
+		return self.value
+
+	def reached(self) -> bool:
+		return self.goal is not None and self.get() >= self.goal
+
+	# Record a solution of the given value, if it improves on the incumbent.
+	# `solution` builds the solution, only if it is to be reported.
+	def offer(self, value, solution=None):
+		if value > self.value:
+			self.value = value
+			if self.report is not None:
+				self.report(solution())
+		if self.shared is not None:
+			with self.shared.get_lock():
+				if value > self.shared.value:
+					self.shared.value = value
+
+def _run(fn, task):
+	if cancelled():
+		return None
+	return fn(task)
+
+# Seconds between checks of the budget while waiting for workers.
+POLL_INTERVAL = 0.05
+
+# Default number of workers: one per core.
+def default_workers() -> int:
+	return mp.cpu_count()
+
+class SearchPool():
+	def __init__(self, workers=None):
+		if workers is None:
+			workers = default_workers()
+		self.workers = workers
+		self.stop = mp.Event()
+		self.best = mp.Value('q', 0)
+		self.pool = mp.Pool(workers, initializer=_init_worker, initargs=(self.stop, self.best))
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
+
+	def close(self):
+		self.pool.terminate()
+		self.pool.join()
+
+	# Run `fn` (a module-level function) over `tasks` and return the first result
+	# that is not None, or None if there is none. Once a result is found, the
+	# remaining tasks are cancelled and `tasks` is not consumed any further.
+	def first(self, fn, tasks) -> object:
+		self.stop.clear()
+		tasks = iter(tasks)
+		results = queue.Queue()
+
+		def submit(task):
+			self.pool.apply_async(_run, (fn, task),
+				callback=lambda r: results.put((True, r)),
+				error_callback=lambda e: results.put((False, e)))
+
+		pending = 0
+		for task in itertools.islice(tasks, 2 * self.workers):
+			submit(task)
+			pending += 1
+
+		result = None
+		error = None
+		while pending:
+			try:
+				(ok, r) = results.get(timeout=POLL_INTERVAL)
+			except queue.Empty:
+				# Pass on a cancellation by the budget to the workers.
+				if cancelled():
+					self.stop.set()
+				continue
+			pending -= 1
+			if not ok:
+				error = r
+				self.stop.set()
+			elif r is not None and result is None:
+				result = r
+				self.stop.set()
+			if not self.stop.is_set():
+				for task in itertools.islice(tasks, 1):
+					submit(task)
+					pending += 1
+
+		self.stop.clear()
+		if error is not None:
+			raise error
+		return result
+
+	# Run `fn` over `tasks`, returning all results in order. The shared incumbent
+	# starts again from `best`.
+	def map(self, fn, tasks, best=0) -> list:
+		self.stop.clear()
+		self.best.value = best
+		results = self.pool.map_async(fn, tasks, chunksize=1)
+		while not results.ready():
+			results.wait(POLL_INTERVAL)
+			if cancelled():
+				self.stop.set()
+		self.stop.clear()
+		return results.get()
@@ -2,16 +2,31 @@ import matplotlib.pyplot as plt
 
 from benchmark import *
 
-# Combine a set of graphs with a results file to create data suitable for plotting.
+# Combine a set of graphs with a results file to create data suitable for plotting:
+# tuples (n, k, fvs, time) for the finished instances and (n, k) for the others.
+# The graphs are either pickled or a binary dataset, whose graphs are not built.
+# The results are either a pickled list of (fvs, time), or a JSON-lines file
+# written by run_benchmark, for which the FVS is replaced by its size and the
+# time is CPU time. Instances missing from the results count as timed out.
 #
 # Example:
 # ic_plottable, ic_timed_out = combine_results('data/01_small_n.graphs', 'results/michael-server/small_ic.results')
+# ic_plottable, ic_timed_out = combine_results('data/01_small_n.graphs', 'results/small_ic.jsonl')
 def combine_results(graph_file, results_file) -> (list, list):
-	graphs = from_disk(graph_file)
-	results = from_disk(results_file)
-
-	plottable = [(g, k, res[0], res[1]) for ((g, k), res) in zip(graphs, results) if res is not None]
-	timed_out = [(g, k) for ((g, k), res) in zip(graphs, results) if res is None]
+	graphs = load_instances(graph_file)
+	if isinstance(graphs, Dataset):
+		sizes = [(graphs.order(i), graphs.k(i)) for i in range(len(graphs))]
+	else:
+		sizes = [(len(g), k) for (g, k) in graphs]
+	if results_file.endswith('.jsonl'):
+		records = {r["instance"]: r for r in load_results(results_file) if r["status"] == "ok"}
+		results = [(records[i]["size"], records[i]["cpu"]) if i in records else None
+			for i in range(len(sizes))]
+	else:
+		results = from_disk(results_file)
+
+	plottable = [(n, k, res[0], res[1]) for ((n, k), res) in zip(sizes, results) if res is not None]
+	timed_out = [(n, k) for ((n, k), res) in zip(sizes, results) if res is None]
 
 	return (plottable, timed_out)
 
@@ -22,7 +37,7 @@ def k_values(data):
 	return [k for (_, k, _, _) in data]
 
 def n_values(data):
-	return [len(g) for (g, _, _, _) in data]
+	return [n for (n, _, _, _) in data]
 
 # Make a plot of running time against k.
 def plot_time_vs_k(data, colour, annotate=set()):
@@ -60,6 +75,26 @@ def plot_time_vs_n(data, colour):
 
 	plt.show()
 
+# Make a plot of search tree size against k, from a results file written by
+# run_benchmark with collect_stats.
+#
+# Example:
+# plot_nodes_vs_k('results/small_ic.jsonl', 'blue')
+def plot_nodes_vs_k(results_file, colour):
+	records = [r for r in load_results(results_file) if "stats" in r]
+	xs = [r["k"] for r in records]
+	ys = [r["stats"].get("nodes", 0) for r in records]
+
+	fig, ax = plt.subplots()
+	ax.scatter(xs, ys, c=colour)
+
+	plt.xlabel("Minimum FVS size, $k$")
+	plt.ylabel("Search tree nodes")
+	plt.xlim([0, max(xs) + 1])
+	plt.yscale("symlog")
+
+	plt.show()
+
 # Plot the time for yes instances minus the time for no instances.
 def plot_yes_no_difference(yes_data, no_data, colour):
 	# Use the true k values on the x axis.
@@ -0,0 +1,73 @@
+# Search statistics collected by the solvers when given a SearchStats.
+#
+# A SearchStats is a plain dict of counters, so it can be dumped as JSON next to
+# the benchmark results. The solvers check for None before recording anything,
+# so collection costs nothing when it is off. Keys used by the solvers:
+#
+# fvs_via_ic:
+# * rounds: ic_compression calls made by iterative compression.
+# * guesses: subsets XZ of Z tried by ic_compression.
+# * nodes: fvs_disjoint search nodes.
+# * reduction1, reduction2, reduction3: times each reduction fired.
+# fvs_via_mif and mif:
+# * nodes: mif_main calls.
+# * branch_max_degree, branch_gd3, branch_gd2: branchings by each rule of
+#   mif_main, and gd1: vertices of generalized degree <= 1 added to F.
+# Both:
+# * max_depth: deepest recursion reached.
+# * time_<phase>: seconds spent in each phase (kernel, bound, decompose, search).
+# fvs_via_tw and fvs_auto:
+# * width: width of the tree decomposition of the kernel.
+# * states: DP states over all bags, before forgetting.
+# min_fvs:
+# * budgets: decision calls made for the values of k tried.
+
+import time
+from contextlib import contextmanager
+
+class SearchStats(dict):
+	def __init__(self, *args, **kwargs):
+		super().__init__(*args, **kwargs)
+		self.depth = 0
+
+	def count(self, key, n=1):
+		self[key] = self.get(key, 0) + n
+
+	# Record reaching the given depth of a search.
+	def reach(self, depth):
+		if depth > self.get('max_depth', 0):
+			self['max_depth'] = depth
+
+	# Record entering and leaving a level of the recursion.
+	def enter(self):
+		self.depth += 1
+		self.reach(self.depth)
+
+	def leave(self):
+		self.depth -= 1
+
+	# Time the body of a `with` block as part of the given phase.
+	@contextmanager
+	def phase(self, name):
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			self.count('time_' + name, time.perf_counter() - start)
+
+	# Add the counters of another collector (from a worker, say) to these.
+	def merge(self, other: dict):
+		for (key, value) in other.items():
+			if key == 'max_depth':
+				self[key] = max(self.get(key, 0), value)
+			else:
+				self.count(key, value)
+
+# A `with` block that times a phase if stats are being collected.
+@contextmanager
+def phase(stats, name):
+	if stats is None:
+		yield
+	else:
+		with stats.phase(name):
+			yield
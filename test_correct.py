@@ -1,5 +1,22 @@
+import itertools
+import pickle
+import random
+import subprocess
+import sys
+
+import pytest
+
 from fvs import *
-from generate import generate
+from generate import generate, generate_batch, batch_graph, write_collection
+from kernel import flower
+from bounds import degree_bound, cycle_packing, lower_bound
+from benchmark import run_benchmark, load_results
+from dataset import Dataset, write_dataset, load_instances, pickle_to_dataset
+from approx import approx_fvs, fvs_via_approx, APPROXIMATIONS
+from dynamic import DynamicFVS
+from minimum import min_fvs, STRATEGIES
+from verify import verify_all, certify, check_certificate
+from treewidth import tree_decomposition, tw_min_fvs, fvs_via_tw, fvs_auto, HEURISTICS
 
 def test_cycle_graphs_ic():
 	meta_cycle_graphs(fvs_via_ic)
@@ -9,7 +26,7 @@ def test_cycle_graphs_mif():
 
 def meta_cycle_graphs(alg):
 	for i in range(3, 20):
-		g = MultiGraph(data=nx.cycle_graph(i))
+		g = MultiGraph(nx.cycle_graph(i))
 		fvs = alg(g, 1)
 		assert fvs != None
 		assert is_fvs(g, fvs)
@@ -22,7 +39,7 @@ def test_complete_graphs_mif():
 
 def meta_complete_graphs(alg):
 	for i in range(3, 14):
-		g = MultiGraph(data=nx.complete_graph(i))
+		g = MultiGraph(nx.complete_graph(i))
 		fvs = alg(g, i - 2)
 		assert fvs != None
 		assert is_fvs(g, fvs)
@@ -66,3 +83,465 @@ def meta_generated(alg):
 			assert is_fvs(g, fvs)
 			assert len(fvs) == i
 
+
+def test_graph_operations():
+	g = Graph(5)
+	for (u, v) in [(0, 1), (1, 2), (2, 0), (2, 3), (3, 4)]:
+		g.add_edge(u, v)
+	assert not is_forest(g)
+	assert is_forest(g, {0, 1, 3, 4})
+	# Bypassing 1 turns the triangle into a double edge.
+	assert set(g.contract(1)) == {0, 2}
+	assert g.multiplicity(0, 2) == 2 and g.degree(2) == 3
+	g.merge(2, {0, 3})
+	assert g.adj[2] == {4: 1} and g.m == 1
+	g.remove_vertex(4)
+	assert list(g) == [2] and g.m == 0
+
+def test_solvers_preserve_input():
+	for alg in [fvs_via_ic, fvs_via_mif]:
+		g = MultiGraph(nx.complete_graph(6))
+		fvs = alg(g, 4)
+		assert len(g) == 6 and len(g.edges()) == 15
+		assert is_fvs(g, fvs)
+
+def test_graph_undo():
+	g = Graph(4)
+	for (u, v) in [(0, 1), (1, 2), (2, 0), (2, 3), (3, 3)]:
+		g.add_edge(u, v)
+	before = (g.copy().adj, g.m, g.edge_hash)
+	g.trail = []
+	g.contract(1)
+	g.remove_vertex(3)
+	g.merge(0, {2})
+	assert g.edge_hash == g.subgraph(g.vertices).edge_hash
+	undo(g.trail, 0)
+	assert (g.adj, g.m, g.edge_hash) == before and len(g) == 4
+
+def test_forest_tracking():
+	g = Graph(5)
+	for (u, v) in [(0, 1), (1, 2), (2, 3), (3, 0), (4, 0), (4, 4)]:
+		g.add_edge(u, v)
+	w = induced_forest(g, {0, 1, 2})
+	assert w is not None and w.find(0) == w.find(2)
+	assert closes_cycle(g, w, 3) and closes_cycle(g, w, 4)
+	assert induced_forest(g, {0, 1, 2, 3}) is None
+	w = induced_forest(g, {0, 1})
+	w.trail = []
+	assert not closes_cycle(g, w, 3)
+	assert add_to_forest(g, w, 2) and not add_to_forest(g, w, 3)
+	undo(w.trail, 0)
+	assert 2 not in w and not closes_cycle(g, w, 3)
+
+def test_parallel_ic():
+	parallel_ic = lambda g, k: fvs_via_ic(g, k, workers=2)
+	meta_complete_graphs(parallel_ic)
+	meta_example(parallel_ic)
+
+def test_mif_optimisation():
+	for workers in [1, 2]:
+		for i in range(3, 9):
+			g = MultiGraph(nx.complete_graph(i))
+			assert len(mif(g, workers=workers)) == 2
+		g = MultiGraph(nx.cycle_graph(7))
+		g.add_edges_from([(0, 3), (7, 8), (8, 9), (9, 7)])
+		assert len(mif(g, workers=workers)) == 8
+	meta_example(lambda g, k: fvs_via_mif(g, k, workers=2))
+	with pytest.raises(ValueError):
+		mif(MultiGraph([(0, 1), (0, 1)]))
+	# The parallel tasks split the search of the largest component between them.
+	g = nx.disjoint_union(nx.gnm_random_graph(22, 40, seed=1), nx.gnm_random_graph(22, 40, seed=2))
+	(gx, _) = from_networkx(g)
+	stats = SearchStats()
+	assert len(mif_task((gx.copy(), None, (), None, stats, 'dfs'))) == 33
+	for path in itertools.product([True, False], repeat=3):
+		path_stats = SearchStats()
+		mif_task((gx.copy(), None, path, None, path_stats, 'dfs'))
+		assert path_stats['nodes'] < stats['nodes']
+	assert len(mif(g, workers=2)) == 33
+
+def test_mif_multigraphs():
+	# Double edges need one of their ends, and self-loops their vertex.
+	g = MultiGraph([(0, 1), (0, 1), (0, 4), (0, 3), (1, 2), (1, 3), (4, 6)])
+	g2 = MultiGraph([(0, 1), (0, 1), (2, 3), (3, 4), (4, 2)])
+	g3 = MultiGraph([(0, 0), (0, 1), (1, 2), (2, 0), (3, 3), (3, 4), (4, 5), (5, 3)])
+	for kernel in [True, False]:
+		for (h, k) in [(g, 1), (g2, 2), (g3, 2)]:
+			fvs = fvs_via_mif(h, k, kernel=kernel)
+			assert fvs is not None and len(fvs) <= k and is_fvs(h, fvs)
+			assert fvs_via_mif(h, k - 1, kernel=kernel) is None
+
+def test_kernel():
+	# A cycle hung off a K5 by a path: the cycle reduces to a forced vertex.
+	g = MultiGraph(nx.complete_graph(5))
+	g.add_edges_from([(4, 5), (5, 6), (6, 7), (7, 8), (8, 9), (9, 6)])
+	(gx, k, forced) = kernelize(g, 4)
+	assert k == 3 and len(forced) == 1 and forced < {6, 7, 8, 9}
+	assert set(gx.nodes()) == set(range(5))
+	assert is_fvs(g, lift({0, 1, 2}, forced))
+	# A flower of k + 1 double edges at 0 forces 0.
+	g = MultiGraph([(0, 1), (0, 1), (0, 2), (0, 2), (1, 2)])
+	(gx, k, forced) = kernelize(g, 1)
+	assert forced == {0} and k == 0
+	assert kernelize(g, 0)[1] < 0
+	(g, _) = from_networkx(nx.complete_graph(6))
+	assert flower(g, 0, 5) == 2
+	# Three vertices joined to N others: the expansion rule leaves O(k²).
+	for n in [10, 100, 1000]:
+		g = MultiGraph([(c, i) for c in ['v', 'a', 'b'] for i in range(n)])
+		(gx, k, forced) = kernelize(g, 2)
+		assert k >= 0 and len(gx) + len(forced) <= 13 * 2 * 2
+		assert is_fvs(g, lift(fvs_via_ic(gx, k, kernel=False), forced))
+		assert kernelize(g, 1)[1] < 0
+
+def test_generated_ic_without_kernel():
+	meta_generated(lambda g, k: fvs_via_ic(g, k, kernel=False))
+
+def test_decomposition():
+	# A K4 and two cyclic blocks hanging off it, plus a separate K5.
+	g = MultiGraph(nx.complete_graph(4))
+	g.add_edges_from([(0, 4), (4, 5), (5, 6), (6, 4), (4, 7), (7, 0), (4, 8), (8, 9), (9, 0)])
+	g.add_edges_from([(10 + u, 10 + v) for (u, v) in nx.complete_graph(5).edges()])
+	(gx, labels) = from_networkx(g)
+	assert len(biconnected_components(gx)) == 4
+	for kernel in [True, False]:
+		assert fvs_via_ic(g, 5, kernel=kernel) is None
+		fvs = fvs_via_ic(g, 6, kernel=kernel)
+		assert fvs is not None and len(fvs) <= 6 and is_fvs(g, fvs)
+
+def test_ic_warm_start_and_orders():
+	# Two K5s joined by a path: the optimum is 6, and a greedy FVS finds it.
+	g = MultiGraph(nx.complete_graph(5))
+	g.add_edges_from([(5 + u, 5 + v) for (u, v) in nx.complete_graph(5).edges()])
+	g.add_edges_from([(4, 10), (10, 5)])
+	(gx, _) = from_networkx(g)
+	assert is_fvs(gx, greedy_fvs(gx))
+	for order in [None] + list(VERTEX_ORDERS):
+		assert sorted(VERTEX_ORDERS.get(order, sorted)(gx)) == list(range(11))
+		for start in [None, 'greedy']:
+			stats = SearchStats()
+			assert fvs_via_ic(g, 5, kernel=False, decompose=False, start=start, order=order) is None
+			fvs = fvs_via_ic(g, 6, kernel=False, decompose=False, start=start, order=order, stats=stats)
+			assert fvs is not None and len(fvs) <= 6 and is_fvs(g, fvs)
+			if start is not None:
+				assert stats.get('rounds', 0) == 0
+
+def test_lower_bounds():
+	(g, _) = from_networkx(nx.complete_graph(5))
+	assert degree_bound(g) == 2 and len(cycle_packing(g)) == 1
+	assert lower_bound(g) == 2
+	# Three disjoint triangles, two of them joined by an edge.
+	(g, _) = from_networkx(nx.MultiGraph([(0, 1), (1, 2), (2, 0), (3, 4), (4, 5), (5, 3), (6, 7), (7, 8), (8, 6), (2, 3)]))
+	edges = sorted(g.edges())
+	cycles = cycle_packing(g)
+	# The packing works on G itself and restores it afterwards.
+	assert sorted(g.edges()) == edges and len(g) == 9 and g.trail is None
+	assert len(cycles) == 3 and all(not is_fvs(g.subgraph(c), set()) for c in cycles)
+	assert lower_bound(g, limit=2) >= 2
+	# Cycles may share vertices that cannot be deleted.
+	(g, _) = from_networkx(nx.MultiGraph([(0, 1), (1, 2), (2, 0), (0, 3), (3, 4), (4, 0)]))
+	assert len(cycle_packing(g)) == 1 and len(cycle_packing(g, {0})) == 2
+	for alg in [fvs_via_ic, fvs_via_mif]:
+		assert alg(g, 0) is None and alg(g, 1) == {0}
+
+def test_search_cache():
+	memo = SearchCache(max_bytes=4000)
+	memo.store(1, frozenset({1, 2}))
+	assert memo.lookup(1) == (True, frozenset({1, 2})) and memo.lookup(2) == (False, None)
+	for i in range(100):
+		memo.store((i, i), None)
+	assert memo.bytes <= 4000 and memo.lookup(1)[0] is False
+	# A hit is checked against the edges stored with it.
+	(g, _) = from_networkx(nx.path_graph(3))
+	(h, _) = from_networkx(nx.star_graph(2))
+	memo.store('g', None, edge_key(g))
+	assert memo.lookup('g', g) == (True, None) and memo.lookup('g', h) == (False, None)
+	assert memo.collisions == 1
+	# A second run of the same instances is answered from the cache.
+	g = MultiGraph(nx.complete_graph(5))
+	g.add_edges_from([(5 + u, 5 + v) for (u, v) in nx.complete_graph(5).edges()])
+	g.add_edges_from([(4, 10), (10, 5), (3, 6)])
+	memo = SearchCache()
+	for run in range(2):
+		assert fvs_via_ic(g, 5, kernel=False, decompose=False, memo=memo) is None
+		assert fvs_via_mif(g, 5, kernel=False, memo=memo) is None
+		for alg in [fvs_via_ic, fvs_via_mif]:
+			fvs = alg(g, 6, kernel=False, memo=memo)
+			assert fvs is not None and len(fvs) <= 6 and is_fvs(g, fvs)
+		if run == 0:
+			hits = memo.hits
+	assert len(memo) > 0 and memo.hits > hits
+
+def test_generalized_degree():
+	# Path 0-1-2 in F, with 1 also joined to 3 and 4, and 4 joined to 2.
+	(g, _) = from_networkx(nx.MultiGraph([(0, 1), (1, 2), (1, 3), (1, 4), (4, 2), (3, 5)]))
+	assert generalized_degree(g, {0, 2}, 0, 1) == (1, {3})
+	gx = compress(g, {2}, 1)
+	assert set(gx.neighbours(1)) == {0, 3} and 4 not in gx and 4 in g
+	assert g.contract_set(1, {2}) == [4] and g.degree(1) == 2 and 2 not in g
+
+def test_run_benchmark(tmp_path):
+	results_file = str(tmp_path / "results.jsonl")
+	g = MultiGraph(nx.complete_graph(5))
+	instances = [(g, 3), (g, 2)]
+	assert run_benchmark(instances, fvs_via_ic, results_file, workers=2) == 2
+	# A second run resumes, with nothing left to do.
+	assert run_benchmark(instances, fvs_via_ic, results_file) == 0
+	records = load_results(results_file)
+	assert [(r["instance"], r["status"], r["size"]) for r in records] == [(0, "ok", 3), (1, "ok", None)]
+	assert records[0]["valid"] and records[0]["rss"] > 0
+	# A record torn by a crash is dropped and its instance run again.
+	with open(results_file) as f:
+		lines = f.readlines()
+	with open(results_file, "w") as f:
+		f.write(lines[0] + '{"instance": 1, "status": "o')
+	assert run_benchmark(instances, fvs_via_ic, results_file) == 1
+	assert [r["instance"] for r in load_results(results_file)] == [0, 1]
+	assert run_benchmark(instances, fvs_via_ic, results_file) == 0
+
+def test_search_stats():
+	g = MultiGraph(nx.gnm_random_graph(20, 32, seed=1))
+	stats = SearchStats()
+	assert fvs_via_ic(g, 4, kernel=False, decompose=False, stats=stats) is not None
+	assert stats['rounds'] >= 1 and stats['guesses'] >= 1 and stats['nodes'] >= 1
+	assert stats['reduction1'] >= 1 and stats['max_depth'] >= 1
+	assert stats['time_search'] > 0 and stats.depth == 0
+	stats = SearchStats()
+	assert fvs_via_mif(g, 4, kernel=False, stats=stats) is not None
+	assert stats['nodes'] >= 1 and stats.depth == 0
+	assert sum(stats.get(b, 0) for b in ['branch_max_degree', 'branch_gd3', 'branch_gd2']) >= 1
+	merged = SearchStats({'nodes': 1, 'max_depth': 50})
+	merged.merge(stats)
+	assert merged['nodes'] == stats['nodes'] + 1 and merged['max_depth'] == 50
+
+def test_search_orders():
+	g = MultiGraph(nx.gnm_random_graph(20, 32, seed=1))
+	for search in DISJOINT_SEARCHES:
+		assert fvs_via_ic(g, 3, kernel=False, search=search) is None
+		fvs = fvs_via_ic(g, 4, kernel=False, search=search)
+		assert fvs is not None and len(fvs) <= 4 and is_fvs(g, fvs)
+	for search in MIF_SEARCHES:
+		assert fvs_via_mif(g, 3, kernel=False, search=search) is None
+		fvs = fvs_via_mif(g, 4, kernel=False, search=search)
+		assert fvs is not None and len(fvs) <= 4 and is_fvs(g, fvs)
+	# Deep searches no longer run into the recursion limit.
+	g = MultiGraph(nx.cycle_graph(400))
+	assert len(fvs_via_mif(g, 1, kernel=False)) == 1
+
+def test_binary_dataset(tmp_path):
+	filename = str(tmp_path / "instances.fvsg")
+	g = MultiGraph([(0, 1), (1, 2), (2, 0), (2, 2), (3, 1), (3, 1)])
+	instances = [(generate(3), 3), (g, 2), (MultiGraph(), 0)]
+	write_dataset(instances, filename)
+	dataset = load_instances(filename)
+	assert isinstance(dataset, Dataset) and len(dataset) == 3
+	assert [dataset.order(i) for i in range(3)] == [len(g) for (g, _) in instances]
+	for ((g, k), (h, k2)) in zip(instances, dataset):
+		assert k == k2 and len(g) == len(h)
+		assert sorted(tuple(sorted(e)) for e in g.edges()) == sorted(h.edges())
+	(h, k) = pickle.loads(pickle.dumps(dataset))[-2]
+	assert k == 2 and len(fvs_via_ic(h, k)) == 2
+	results_file = str(tmp_path / "results.jsonl")
+	assert run_benchmark(dataset, fvs_via_ic, results_file) == 3
+	assert [r["valid"] for r in load_results(results_file)] == [True, True, True]
+
+def test_bundled_data(tmp_path):
+	# The bundled pickles come from NetworkX 1.x, and are rebuilt on loading.
+	instances = load_instances("data/00_tiny.graphs")
+	filename = str(tmp_path / "tiny.fvsg")
+	pickle_to_dataset("data/00_tiny.graphs", filename)
+	dataset = Dataset(filename)
+	assert len(dataset) == len(instances) > 0
+	for ((g, k), (h, k2)) in zip(instances, dataset):
+		assert k == k2 and len(g) == len(h) > 0 and g.number_of_edges() == h.number_of_edges() > 0
+		fvs = fvs_via_ic(g, k)
+		assert fvs is not None and is_fvs(g, fvs) and fvs_via_ic(h, k) is not None
+
+def test_generate_batch(tmp_path):
+	batch = generate_batch([1, 2, 3, 4, 5], 5, seed=3)
+	again = generate_batch([1, 2, 3, 4, 5], 5, seed=3)
+	assert all((e1 == e2).all() for ((_, _, e1), (_, _, e2)) in zip(batch, again))
+	for (n, k, edges) in batch:
+		g = batch_graph(n, edges)
+		assert nx.is_connected(g) and len(g) == n
+		assert fvs_via_ic(g, k) is not None and fvs_via_ic(g, k - 1) is None
+	filename = str(tmp_path / "collection.fvsg")
+	write_collection(filename, 1, 4, 5, 2, seed=1, batch_size=4)
+	dataset = Dataset(filename)
+	assert [k for (_, k) in dataset] == [1, 1, 2, 2, 3, 3]
+	assert all(nx.is_connected(g) for (g, _) in dataset)
+
+def test_approximations():
+	for i in range(3, 12):
+		g = MultiGraph(nx.complete_graph(i))
+		for method in APPROXIMATIONS:
+			fvs = approx_fvs(g, method, rounds=0)
+			assert is_fvs(g, fvs) and len(fvs) == i - 2
+	g = MultiGraph(nx.gnm_random_graph(20, 32, seed=1))
+	for method in APPROXIMATIONS:
+		fvs = approx_fvs(g, method, seed=1)
+		assert is_fvs(g, fvs) and 4 <= len(fvs) <= 8
+	# A 2-approximation at worst, and usually much better after local search.
+	assert fvs_via_approx(g, 8) is not None and fvs_via_approx(g, 3) is None
+	# The approximations are warm starts of iterative compression.
+	for start in ['2approx', 'local']:
+		stats = SearchStats()
+		fvs = fvs_via_ic(g, 4, kernel=False, decompose=False, start=start, stats=stats)
+		assert is_fvs(g, fvs) and len(fvs) <= 4 and stats.get('rounds', 0) <= 1
+	with pytest.raises(ValueError):
+		fvs_via_ic(g, 4, start='unknown')
+	# The names resolve without approx imported first.
+	script = "import networkx as nx, fvs; print(len(fvs.fvs_via_ic(nx.MultiGraph(nx.gnm_random_graph(20, 32, seed=1)), 4, start='2approx')))"
+	result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True)
+	assert result.returncode == 0 and int(result.stdout) <= 4
+
+def test_anytime():
+	g = MultiGraph(nx.gnm_random_graph(60, 100, seed=3))
+	for alg in [fvs_via_ic, fvs_via_mif]:
+		# Out of time, here once the search has improved on the warm start: the
+		# best FVS so far.
+		improvements = []
+		budget = Budget()
+
+		def on_improve(fvs):
+			improvements.append(fvs)
+			if len(improvements) == 2:
+				budget.cancel()
+
+		budget.on_improve = on_improve
+		stats = SearchStats()
+		(fvs, proven) = anytime(alg, g, 9, budget=budget, stats=stats)
+		assert not proven and is_fvs(g, fvs) and len(fvs) > 9 and improvements[-1] == fvs
+		# The calls the search gave up on have left the depth count.
+		assert stats.depth == 0
+		sizes = [len(s) for s in improvements]
+		assert len(sizes) >= 2 and sizes == sorted(set(sizes), reverse=True)
+		# Answered within the budget: proven either way.
+		assert anytime(alg, g, 2, 10) == (None, True)
+		(fvs, proven) = anytime(alg, g, 30, 10)
+		assert proven and is_fvs(g, fvs) and len(fvs) <= 30
+	# Compression rounds improve on a poor warm start before the NO answer.
+	h = MultiGraph(nx.gnm_random_graph(40, 70, seed=3))
+	for decompose in [True, False]:
+		improvements = []
+		(fvs, proven) = anytime(fvs_via_ic, h, 8, None, improvements.append, start=lambda x: set(x.vertices), decompose=decompose)
+		assert fvs is None and proven
+		assert len(improvements) >= 2 and len(improvements[-1]) == 9
+		assert all(is_fvs(h, s) for s in improvements)
+	# With k >= n, an empty forest will do, and its complement is an FVS.
+	for k in [4, 5]:
+		(fvs, proven) = anytime(fvs_via_mif, nx.complete_graph(4), k, 10, kernel=False)
+		assert proven and is_fvs(nx.complete_graph(4), fvs)
+	# A cancelled budget stops the search at once.
+	budget = Budget()
+	budget.cancel()
+	(fvs, proven) = anytime(fvs_via_ic, g, 9, budget=budget, kernel=False, workers=2)
+	assert not proven and is_fvs(g, fvs)
+
+def test_dynamic_fvs():
+	rng = random.Random(5)
+	g = MultiGraph(nx.gnm_random_graph(12, 16, seed=5))
+	dynamic = DynamicFVS(g)
+	bounded = DynamicFVS(g, k=3)
+	for _ in range(60):
+		edges = list(g.edges())
+		if edges and rng.random() < 0.4:
+			(u, v) = rng.choice(edges)
+			g.remove_edge(u, v)
+			for d in [dynamic, bounded]:
+				d.remove_edge(u, v)
+		elif rng.random() < 0.1:
+			v = rng.choice(list(g.nodes()))
+			g.remove_node(v)
+			for d in [dynamic, bounded]:
+				d.remove_vertex(v)
+		else:
+			(u, v) = (rng.randrange(14), rng.randrange(14))
+			g.add_edge(u, v)
+			for d in [dynamic, bounded]:
+				d.add_edge(u, v)
+		fvs = dynamic.solution
+		assert is_fvs(g, fvs) and (not fvs or fvs_via_ic(g, len(fvs) - 1) is None)
+		fvs = bounded.solution
+		assert is_fvs(g, fvs) and (len(fvs) <= 3) == (fvs_via_ic(g, 3) is not None)
+
+def test_min_fvs():
+	for seed in range(4):
+		g = MultiGraph(nx.gnm_random_graph(16, 26, seed=seed))
+		size = None
+		for strategy in STRATEGIES:
+			for alg in [fvs_via_ic, fvs_via_mif]:
+				if strategy == 'incremental' and alg is fvs_via_mif:
+					continue
+				fvs = min_fvs(g, strategy, alg)
+				assert is_fvs(g, fvs)
+				size = len(fvs) if size is None else size
+				assert len(fvs) == size
+		assert fvs_via_ic(g, size - 1) is None
+	stats = SearchStats()
+	assert len(min_fvs(nx.complete_graph(7), 'binary', stats=stats)) == 5
+	assert stats.get('budgets', 0) <= 3
+
+def test_f_components():
+	g = Graph(8)
+	for (u, v) in [(0, 1), (1, 2), (2, 3), (3, 4), (5, 6), (6, 7)]:
+		g.add_edge(u, v)
+	# F = {0, 2, 4, 6} is independent until 1 and 7 join it.
+	f = {0, 1, 2, 4, 6, 7}
+	expected = sorted([{0, 1, 2}, {6, 7}], key=min)
+	assert sorted(f_components(g, f, {1, 7}), key=min) == expected
+	assert sorted(f_components(g, f), key=min) == expected
+	assert f_components(g, f, ()) == []
+
+def test_verification():
+	g = MultiGraph([(0, 1), (1, 2), (2, 0), (2, 3), (3, 3), (4, 5), (4, 5)])
+	assert is_fvs(g, {2, 3, 4}) and is_fvs(g, [0, 3, 5]) and not is_fvs(g, {2, 4})
+	assert not is_fvs(g, {2, 3}) and is_fvs(g, {0, 3, 4, 'x'})
+	(gx, _) = from_networkx(g)
+	assert is_fvs(gx, {2, 3, 4}) and not is_fvs(gx, {2, 3})
+	pairs = [(g, {2, 3, 4}), (g, {2, 3}), (gx, {1, 3, 5})]
+	assert verify_all(pairs) == [True, False, True]
+	assert verify_all(pairs, workers=2) == [True, False, True]
+
+	# Certificates: an FVS, a cycle packing, or a summary of the search.
+	cert = certify(fvs_via_ic, g, 3)
+	assert cert["answer"] == "yes" and check_certificate(g, cert)
+	cert = certify(fvs_via_mif, g, 2)
+	assert cert["answer"] == "no" and len(cert["cycles"]) == 3 and check_certificate(g, cert)
+	assert not check_certificate(g, dict(cert, k=3))
+	assert not check_certificate(g, dict(cert, cycles=[[0, 1, 3], [4, 5], [3]]))
+	assert not check_certificate(g, {"answer": "yes", "k": 2, "fvs": [2, 3]})
+	k5 = nx.complete_graph(5)
+	cert = certify(fvs_via_ic, k5, 2)
+	assert cert["answer"] == "no" and "search" in cert and check_certificate(k5, cert) is None
+
+def test_treewidth():
+	g = MultiGraph(nx.gnm_random_graph(16, 26, seed=2))
+	g.add_edges_from([(0, 0), (3, 4), (3, 4)])
+	(gx, _) = from_networkx(g)
+	size = len(min_fvs_ic(gx, 16))
+	for heuristic in HEURISTICS:
+		(width, order, bags, parent) = tree_decomposition(gx, heuristic)
+		assert sorted(order) == sorted(gx.vertices)
+		assert all(any({u, v} <= bag for bag in bags.values()) for (u, v) in gx.edges())
+		fvs = tw_min_fvs(gx, heuristic)
+		assert is_fvs(gx, fvs) and len(fvs) == size
+	assert fvs_via_tw(g, size) is not None and fvs_via_tw(g, size - 1) is None
+	# A grid has a large minimum FVS but a narrow decomposition.
+	grid = MultiGraph(nx.grid_2d_graph(3, 12))
+	stats = SearchStats()
+	fvs = fvs_auto(grid, 9, stats=stats)
+	assert is_fvs(grid, fvs) and len(fvs) == 9 and stats['width'] <= 3
+	assert fvs_auto(grid, 8) is None and fvs_via_ic(grid, 8) is None
+	# Wide kernels go to iterative compression.
+	stats = SearchStats()
+	assert len(fvs_auto(nx.complete_graph(9), 7, stats=stats)) == 7 and stats['width'] == 8
+	# They solve the kernel fvs_auto made, or G itself without the kernel.
+	h = MultiGraph(nx.complete_graph(9))
+	h.add_edges_from([(8, 'a'), ('a', 'b'), ('b', 'c'), ('c', 'a')])
+	for kernel in [True, False]:
+		stats = SearchStats()
+		fvs = fvs_auto(h, 8, kernel=kernel, stats=stats)
+		assert is_fvs(h, fvs) and len(fvs) == 8 and stats['width'] == 8
+		assert ('time_kernel' in stats) == kernel
+		assert fvs_auto(h, 7, kernel=kernel) is None
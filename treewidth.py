@@ -0,0 +1,246 @@
+# An exact FVS solver by dynamic programming over a tree decomposition, for
+# graphs of small treewidth however large their minimum FVS, and a dispatcher
+# choosing between it and iterative compression.
+#
+# The decomposition comes from an elimination order (min-degree or min-fill):
+# eliminating v makes its remaining neighbours a clique, and its bag is v with
+# those neighbours. The parent of v's bag is the bag of the neighbour eliminated
+# first, which contains the rest of v's bag, so v is forgotten on the way up
+# from its own bag. Each edge belongs to the bag of the end eliminated first.
+#
+# The DP looks for a maximum induced forest. A state of a bag is a partition
+# of the vertices of the bag kept in the forest into the components of the
+# forest built so far below the bag, and its value is the most forest vertices
+# that can be kept below and in the bag. With bags of at most w + 1 vertices,
+# there are at most Bell(w + 2) states per bag, so the DP takes about n·c^w
+# time rather than exponential time in k.
+
+import heapq
+import itertools
+
+from fvs import *
+
+# The widest decomposition fvs_auto hands to the DP.
+TREEWIDTH_LIMIT = 5
+
+# The adjacency of the simple graph underlying G, as sets without self-loops.
+def simple_adjacency(g: Graph) -> dict:
+	return {v: set(g.adj[v]).difference({v}) for v in g.vertices}
+
+def min_degree(adj: dict, v) -> int:
+	return len(adj[v])
+
+# The number of edges eliminating v would add between its neighbours.
+def min_fill(adj: dict, v) -> int:
+	nb = list(adj[v])
+	return sum(1 for (i, u) in enumerate(nb) for x in nb[i + 1:] if x not in adj[u])
+
+HEURISTICS = {'min_degree': min_degree, 'min_fill': min_fill}
+
+# A tree decomposition of G from the elimination order picked by `heuristic`
+# (one of HEURISTICS). Vertices are eliminated from a heap whose entries are
+# checked when popped, and only the vertices whose score can have changed are
+# pushed again. Returns (width, order, bags, parent): bags[v] is the bag of the
+# vertex v, which was eliminated `order`-th, and parent[v] is the vertex whose
+# bag is the parent of v's (None for a root).
+def tree_decomposition(g: Graph, heuristic='min_degree') -> (int, list, dict, dict):
+	score = HEURISTICS[heuristic]
+	adj = simple_adjacency(g)
+	heap = [(score(adj, v), v) for v in adj]
+	heapq.heapify(heap)
+	order = []
+	bags = {}
+	width = -1
+	while heap:
+		(s, v) = heapq.heappop(heap)
+		if v in bags:
+			continue
+		current = score(adj, v)
+		if current != s:
+			heapq.heappush(heap, (current, v))
+			continue
+		nb = adj.pop(v)
+		for u in nb:
+			adj[u].discard(v)
+			adj[u].update(nb)
+			adj[u].discard(u)
+		bags[v] = nb | {v}
+		order.append(v)
+		width = max(width, len(nb))
+
+		changed = set(nb)
+		if score is min_fill:
+			for u in nb:
+				changed.update(adj[u])
+		for u in changed:
+			heapq.heappush(heap, (score(adj, u), u))
+
+	position = {v: i for (i, v) in enumerate(order)}
+	parent = {v: min(bags[v].difference({v}), key=position.get, default=None) for v in order}
+	return (width, order, bags, parent)
+
+# A partition as a canonical tuple of sorted tuples.
+def _canonical(classes) -> tuple:
+	return tuple(sorted(tuple(sorted(c)) for c in classes))
+
+# Join the classes of the partitions p and q (of sets of vertices that may
+# overlap), as the forests they stand for share those vertices. Returns the
+# joined partition, or None if joining them closes a cycle.
+def _join(p: tuple, q: tuple) -> tuple:
+	parent = {}
+
+	def find(v):
+		parent.setdefault(v, v)
+		while parent[v] != v:
+			parent[v] = parent[parent[v]]
+			v = parent[v]
+		return v
+
+	for c in itertools.chain(p, q):
+		root = find(c[0])
+		for v in c[1:]:
+			r = find(v)
+			if r == root:
+				return None
+			parent[r] = root
+	classes = {}
+	for v in parent:
+		classes.setdefault(find(v), []).append(v)
+	return _canonical(classes.values())
+
+# The states of the bag of v before its children are joined in, one for each
+# subset S of the bag. The edges of the bag all end at v, so if v is kept its
+# class is v with its neighbours in S, and every other vertex is a class of its
+# own. Values count the vertices of S, and the solution records S.
+def _base_table(g: Graph, v, bag: set) -> dict:
+	av = g.adj[v]
+	others = sorted(bag.difference({v}))
+	table = {}
+	for r in range(len(others) + 1):
+		for kept in itertools.combinations(others, r):
+			table[_canonical([u] for u in kept)] = (r, ('kept', kept))
+			# Keeping v closes a cycle through a self-loop or a parallel edge.
+			if v in av or any(av.get(u, 0) >= 2 for u in kept):
+				continue
+			joined = [v] + [u for u in kept if u in av]
+			classes = [joined] + [[u] for u in kept if u not in av]
+			table[_canonical(classes)] = (r + 1, ('kept', kept + (v,)))
+	return table
+
+# Join the table of a child, over the vertices `shared` with the bag, into the
+# table of the bag. A vertex of S ∩ shared is counted by both tables.
+def _join_tables(table: dict, child: dict, shared: set) -> dict:
+	by_kept = {}
+	for (q, entry) in child.items():
+		kept = frozenset(itertools.chain.from_iterable(q))
+		by_kept.setdefault(kept, []).append((q, entry))
+	joined = {}
+	for (p, (value, soln)) in table.items():
+		kept = shared.intersection(itertools.chain.from_iterable(p))
+		for (q, (child_value, child_soln)) in by_kept.get(frozenset(kept), ()):
+			r = _join(p, q)
+			if r is None:
+				continue
+			total = value + child_value - len(kept)
+			if r not in joined or joined[r][0] < total:
+				joined[r] = (total, ('join', soln, child_soln))
+	return joined
+
+# Forget v: drop it from every state, keeping the best value of each result.
+def _forget(table: dict, v) -> dict:
+	forgotten = {}
+	for (p, entry) in table.items():
+		q = _canonical(c for c in ([u for u in c if u != v] for c in p) if c)
+		if q not in forgotten or forgotten[q][0] < entry[0]:
+			forgotten[q] = entry
+	return forgotten
+
+# The vertices recorded in a solution of the DP.
+def _kept(soln) -> set:
+	kept = set()
+	stack = [soln]
+	while stack:
+		s = stack.pop()
+		if s[0] == 'kept':
+			kept.update(s[1])
+		else:
+			stack.extend(s[1:])
+	return kept
+
+# A maximum induced forest of G by DP over the tree decomposition
+# (width, order, bags, parent). The bags are solved in elimination order, which
+# puts every child before its parent. A SearchStats given as `stats` counts the
+# DP states as `states`.
+def tw_forest(g: Graph, decomposition, stats=None) -> set:
+	(_, order, bags, parent) = decomposition
+	pending = {}
+	roots = []
+	for v in order:
+		table = _base_table(g, v, bags[v])
+		for (u, child) in pending.pop(v, ()):
+			table = _join_tables(table, child, bags[u].difference({u}))
+		if stats is not None:
+			stats.count('states', len(table))
+		table = _forget(table, v)
+		if parent[v] is None:
+			roots.append(table)
+		else:
+			pending.setdefault(parent[v], []).append((v, table))
+	forest = set()
+	for table in roots:
+		# Everything is forgotten at a root, leaving the empty partition.
+		forest.update(_kept(table[()][1]))
+	return forest
+
+# A minimum FVS of G (a Graph) by the DP, using the decomposition from
+# `heuristic`.
+def tw_min_fvs(g: Graph, heuristic='min_degree', stats=None) -> set:
+	with phase(stats, 'decompose'):
+		decomposition = tree_decomposition(g, heuristic)
+	if stats is not None:
+		stats['width'] = decomposition[0]
+	with phase(stats, 'search'):
+		return g.vertices.difference(tw_forest(g, decomposition, stats))
+
+# Decide (G, k) with the DP on the kernel (unless `kernel` is False). The time
+# taken grows with the treewidth of the kernel rather than with k. A SearchStats
+# given as `stats` also records the width of the decomposition as `width`, and
+# a Budget only receives the answer, as the DP has no partial solutions.
+def fvs_via_tw(g, k: int, kernel=True, heuristic='min_degree', stats=None, budget=None) -> set:
+	(g, labels) = from_networkx(g)
+	forced = set()
+	if kernel:
+		with phase(stats, 'kernel'):
+			(g, k, forced) = kernelize(g, k)
+		if k < 0:
+			return settle(budget, None)
+	with phase(stats, 'bound'):
+		if lower_bound(g, (), k + 1) > k:
+			return settle(budget, None)
+	soln = tw_min_fvs(g, heuristic, stats)
+	if len(soln) > k:
+		return settle(budget, None)
+	return settle(budget, relabel(lift(soln, forced), labels))
+
+# Decide (G, k) with the DP if the kernel (unless `kernel` is False, G itself)
+# has a tree decomposition of width at most `width`, and otherwise with
+# fvs_via_ic on the same kernel, passing it the other options.
+def fvs_auto(g, k: int, width=TREEWIDTH_LIMIT, kernel=True, heuristic='min_degree', stats=None, budget=None, **options) -> set:
+	(g, labels) = from_networkx(g)
+	forced = set()
+	if kernel:
+		with phase(stats, 'kernel'):
+			(g, k, forced) = kernelize(g, k)
+		if k < 0:
+			return settle(budget, None)
+	with phase(stats, 'decompose'):
+		decomposition = tree_decomposition(g, heuristic)
+	if stats is not None:
+		stats['width'] = decomposition[0]
+	if decomposition[0] > width:
+		return ic_kernel(g, k, forced, labels, stats=stats, budget=budget, **options)
+	with phase(stats, 'search'):
+		soln = g.vertices.difference(tw_forest(g, decomposition, stats))
+	if len(soln) > k:
+		return settle(budget, None)
+	return settle(budget, relabel(lift(soln, forced), labels))
@@ -0,0 +1,107 @@
+# Checking answers of the solvers without solving again.
+#
+# is_fvs and verify_all make a single union-find pass over the edges of G - W,
+# read from the graph's own adjacency (a Graph or a NetworkX graph) without
+# copying or converting it, so each check takes O(n + m).
+#
+# A certificate is a dict, ready to be dumped as JSON, for an instance (G, k):
+# * {"answer": "yes", "k": k, "fvs": [...]}: an FVS of size at most k.
+# * {"answer": "no", "k": k, "cycles": [[...], ...]}: k + 1 vertex-disjoint
+#   cycles, each listed in order around it, which need a vertex each.
+# * {"answer": "no", "k": k, "search": {...}}: the search statistics of the
+#   solver call (see stats.py), when no large enough cycle packing is found.
+#   This only summarises the search, and cannot be checked.
+
+from graph import Graph, from_networkx
+from bounds import cycle_packing
+from parallel import SearchPool
+from stats import SearchStats
+
+# Union-find lookup with path halving, adding v as a singleton if it is new.
+def _find(parent: dict, v):
+	parent.setdefault(v, v)
+	while parent[v] != v:
+		parent[v] = parent[parent[v]]
+		v = parent[v]
+	return v
+
+# Is W an FVS of G? Self-loops and parallel edges count as cycles, and vertices
+# of W that are not in G are ignored.
+def is_fvs(g, w) -> bool:
+	if not isinstance(w, (set, frozenset)):
+		w = set(w)
+	parent = {}
+	for (u, v) in g.edges():
+		if u in w or v in w:
+			continue
+		if u == v:
+			return False
+		ru = _find(parent, u)
+		rv = _find(parent, v)
+		if ru == rv:
+			return False
+		parent[ru] = rv
+	return True
+
+def verify_task(task) -> bool:
+	(g, w) = task
+	return is_fvs(g, w)
+
+# Check a batch of (graph, FVS) pairs, returning a list of results in order.
+# With workers > 1, the pairs are checked on a SearchPool of that many processes.
+def verify_all(instances, workers=1) -> list:
+	if workers > 1:
+		with SearchPool(workers) as pool:
+			return pool.map(verify_task, list(instances))
+	return [verify_task(task) for task in instances]
+
+# Answer (G, k) with the exact solver `alg` (fvs_via_ic or fvs_via_mif, say),
+# and return a certificate of the answer. The options are passed on to `alg`.
+# For a NO answer, cycles are packed greedily in O(k(n + m)) until there are
+# k + 1 of them.
+def certify(alg, g, k: int, **options) -> dict:
+	stats = SearchStats()
+	soln = alg(g, k, stats=stats, **options)
+	if soln is not None:
+		return {"answer": "yes", "k": k, "fvs": list(soln)}
+	(gx, labels) = from_networkx(g)
+	cycles = cycle_packing(gx, (), k + 1)
+	if len(cycles) > k:
+		if labels is not None:
+			cycles = [[labels[v] for v in cycle] for cycle in cycles]
+		return {"answer": "no", "k": k, "cycles": cycles}
+	return {"answer": "no", "k": k, "search": dict(stats)}
+
+# The number of edges between u and v in G (a Graph or a NetworkX graph).
+def _multiplicity(g, u, v) -> int:
+	if u not in g or v not in g:
+		return 0
+	if isinstance(g, Graph):
+		return g.multiplicity(u, v)
+	return g.number_of_edges(u, v)
+
+# Is `cycle` a cycle of G, with its vertices listed in order?
+def is_cycle(g, cycle: list) -> bool:
+	if len(set(cycle)) != len(cycle) or not cycle:
+		return False
+	if len(cycle) <= 2:
+		return _multiplicity(g, cycle[0], cycle[-1]) >= len(cycle)
+	return all(_multiplicity(g, cycle[i - 1], cycle[i]) >= 1 for i in range(len(cycle)))
+
+# Check a certificate of an answer for G: True if it proves the answer and
+# False if it does not. A search summary cannot be checked, giving None. Takes
+# O(n + m).
+def check_certificate(g, certificate: dict):
+	k = certificate["k"]
+	if certificate["answer"] == "yes":
+		fvs = set(certificate["fvs"])
+		return len(fvs) <= k and is_fvs(g, fvs)
+	if "cycles" not in certificate:
+		return None
+	cycles = certificate["cycles"]
+	used = set()
+	for cycle in cycles:
+		if used.intersection(cycle) or not is_cycle(g, cycle):
+			return False
+		used.update(cycle)
+	return len(cycles) > k